@@ -1,7 +1,7 @@
 """Module for SCA Pattern Development Tools
 Copyright (C) 2024 SUSE LLC
 
- Modified:     2024 Nov 04
+ Modified:     2026 Oct 19
 -------------------------------------------------------------------------------
   This program is free software; you can redistribute it and/or modify
   it under the terms of the GNU General Public License as published by
@@ -20,13 +20,26 @@ Copyright (C) 2024 SUSE LLC
 
 """
 
+import io
 import os
 import re
 import sys
+import json
+import time
 import stat
+import struct
+import fcntl
+import sqlite3
+import zlib
+import queue
+import zipfile
+import xml.etree.ElementTree as ET
 import datetime
+import threading
 import requests
 import configparser
+import concurrent.futures
+import shutil
 from shutil import copyfile
 from glob import glob
 import subprocess as sp
@@ -37,11 +50,26 @@ __all__ = [
     'check_directories',
 ]
 
-__version__ = "3.0.3"
+__version__ = "3.1.0"
 
 SUMMARY_FMT = "{0:30} {1:g}"
 sa_distribution_log_filename = "distribution.log"
 sa_main_section = "Main"
+sa_catalog_filename = "sa_catalog.db"
+sa_consolidated_base = "security-announcements"
+# Generated security patterns, one per announcement or one consolidated driver per distribution
+sa_pattern_filter = r"_SUSE-SU.*py$|_SUSE-SU.*pl$|(^|/)" + sa_consolidated_base + r"_[^/]*\.py$"
+sa_store_prefix = "announcements-"
+pattern_index_filename = "pattern_index.json"
+status_snapshot_filename = "status_snapshot.json"
+repo_state_prefix = "repo_state_"
+pattern_content_filename = "pattern_content.db"
+link_cache_filename = "link_cache.json"
+sa_pipeline_prefix = "pipeline_"
+sa_sles_distros = "SUSE Linux Enterprise Server [1-9]|SUSE Linux Enterprise Module for Basesystem [1-9]"
+sa_sles_tag = "sles"
+git_probe_workers = 8
+pattern_repo_exception = "sca-patterns-base|sca-server-report"
 SEPARATOR_LEN = 100
 config_file = "/etc/opt/patdevel/patdev.conf"
 
@@ -186,22 +214,19 @@ self.title
 
             self.msg.normal("Checking for Duplicates")
             self.duplicate_patterns = {}
-            output_string = ''
-            duplicate_tids = sp.getoutput("find " + self.pat_repos_dir + " -type f -exec grep " + self.tid_number + " {} \+ | grep META_LINK_TID")
-            if len(self.bug_number) > 1:
-                duplicate_bugs = sp.getoutput("find " + self.pat_repos_dir + " -type f -exec grep " + self.bug_number + " {} \+ | grep META_LINK_BUG")
-            else:
-                duplicate_bugs = ''
-
-            if len(duplicate_tids) > 0:
-                for dup in duplicate_tids.split("\n"):
-                    self.duplicate_patterns[dup.split(':')[0]] = True
-            if len(duplicate_bugs) > 0:
-                for dup in duplicate_bugs.split("\n"):
-                    self.duplicate_patterns[dup.split(':')[0]] = True
+            duplicate_bugs = False
+            content_index = PatternContentIndex(self.msg, self._config)
+            for filename in content_index.get_pattern_files():
+                for line in content_index.read(filename).splitlines():
+                    if len(self.tid_number) > 0 and "META_LINK_TID" in line and self.tid_number in line:
+                        self.duplicate_patterns[filename] = True
+                    elif len(self.bug_number) > 1 and "META_LINK_BUG" in line and self.bug_number in line:
+                        self.duplicate_patterns[filename] = True
+                        duplicate_bugs = True
+            content_index.close()
 
             if len(self.duplicate_patterns) > 0:
-                if len(duplicate_bugs) > 0:
+                if duplicate_bugs:
                     self.msg.normal("+ Duplicate(s) found using TID{0} or BUG{1}".format(self.tid_number, self.bug_number))
                 else:
                     self.msg.normal("+ Duplicate(s) found using TID{0}".format(self.tid_number))
@@ -218,37 +243,29 @@ self.title
         "Validate URLs built from user inputs"
         self.msg.normal("Validating Solution Links")
         DISPLAY = "{0:21} {1:25} {2}"
-        invalid = False
+        STATUS = {'Invalid BUG': "- Invalid Content", 'Invalid Connection': "- Invalid Connection", 'Server Timeout': "- Invalid Connection", 'Unknown Error': "- Invalid Connection", 'Host Unreachable': "- Invalid Connection"}
+        validator = LinkValidator(self.msg, self._config)
         link_list = self.links.split("|")
+        results = []
         for link in link_list:
             _result = {}
             _result['tag'], _result['url'] = link.split("=", 1)
-            _result['status'] = "+ Confirmed"
-            _result['valid'] = True
             self.msg.verbose("+ Checking", _result['url'])
-            try:
-                x = requests.get(_result['url'])
-            except Exception as error:
-                _result['status'] = "- Invalid Connection"
-                _result['valid'] = False
-
-            if( x.status_code != 200 ):
-                _result['status'] = "- Invalid URL"
-                invalid = True
-                _result['valid'] = False
+            results.append(_result)
+        futures = validator.submit_links([_result['url'] for _result in results])
+        for _result, future in zip(results, futures):
+            status = future.result()
+            if( status == LinkValidator.CONFIRMED ):
+                _result['status'] = "+ Confirmed"
+                _result['valid'] = True
             else:
-                data = x.text.split('\n')
-                badlink = re.compile('Invalid Bug ID|You must enter a valid bug number', re.IGNORECASE)
-                for line in data:
-                    if badlink.search(line):
-                        _result['status'] = "- Invalid Content"
-                        invalid = True
-                        _result['valid'] = False
-                        break
+                _result['status'] = STATUS.get(status, "- " + status)
+                _result['valid'] = False
             self.link_results.append(_result)
             self.bar.inc_count()
             if( self.msg.get_level() == self.msg.LOG_MIN ):
                 self.bar.update()
+        validator.close()
 
         for result in self.link_results:
             self.msg.normal(DISPLAY.format(result['status'], result['tag'], result['url']))
@@ -257,9 +274,10 @@ self.title
         self.msg.normal("Retrieving TID Title")
         this_title = "Unknown - Manually enter the TID title"
         try:
-            x = requests.get(self.tid_url)
+            x = requests.get(self.tid_url, timeout=10)
         except Exception as error:
             self.msg.normal("+ Warning: Couldn't connect to the TID URL, manually enter the title.")
+            return this_title
 
         if( x.status_code == 200 ):
             data = x.text.split('\n')
@@ -823,9 +841,15 @@ class DisplayMessages():
     LOG_LEVELS      = {0: "Quiet", 1: "Minimal", 2: "Normal", 3: "Verbose", 4: "Debug" }
     DISPLAY_PAIR    = "{0:30} = {1}"
     DISPLAY         = "{0:30}"
+    # Keeps lines from worker threads whole
+    print_lock      = threading.Lock()
 
-    def __init__(self, level=LOG_MIN):
+    def __init__(self, level=LOG_MIN, _buffered=False):
         self.level = level
+        # Worker threads buffer their lines until flush so each one's output stays together
+        self.buffer = None
+        if _buffered:
+            self.buffer = []
 
     def __str__ (self):
         return "class %s(level=%r)" % (self.__class__.__name__,self.level)
@@ -861,13 +885,28 @@ class DisplayMessages():
         return validated_level
 
 
+    def flush(self):
+        "Prints the buffered lines and writes directly from then on"
+        if self.buffer is not None:
+            with self.print_lock:
+                for line in self.buffer:
+                    print(line)
+            self.buffer = None
+
+    def __print(self, line = ''):
+        if self.buffer is not None:
+            self.buffer.append(line)
+        else:
+            with self.print_lock:
+                print(line)
+
     def __write_paired_msg(self, level, msgtag, msgstr):
         if( level <= self.level ):
-            print(self.DISPLAY_PAIR.format(msgtag, msgstr))
+            self.__print(self.DISPLAY_PAIR.format(msgtag, msgstr))
 
     def __write_msg(self, level, msgtag):
         if( level <= self.level ):
-            print(self.DISPLAY.format(msgtag))
+            self.__print(self.DISPLAY.format(msgtag))
 
     def quiet(self, msgtag = None, msgstr = None):
         "Write messages even if quiet is set"
@@ -878,7 +917,7 @@ class DisplayMessages():
                 self.__write_msg(self.LOG_QUIET, msgtag)
         else:
             if( self.level >= self.LOG_QUIET ):
-                print()
+                self.__print()
 
     def min(self, msgtag = None, msgstr = None):
         "Write the minium amount of messages"
@@ -889,7 +928,7 @@ class DisplayMessages():
                 self.__write_msg(self.LOG_MIN, msgtag)
         else:
             if( self.level >= self.LOG_MIN ):
-                print()
+                self.__print()
 
     def normal(self, msgtag = None, msgstr = None):
         "Write normal, but significant, messages"
@@ -900,7 +939,7 @@ class DisplayMessages():
                 self.__write_msg(self.LOG_NORMAL, msgtag)
         else:
             if( self.level >= self.LOG_NORMAL ):
-                print()
+                self.__print()
 
     def verbose(self, msgtag = None, msgstr = None):
         "Write more verbose informational messages"
@@ -911,7 +950,7 @@ class DisplayMessages():
                 self.__write_msg(self.LOG_VERBOSE, msgtag)
         else:
             if( self.level >= self.LOG_VERBOSE ):
-                print()
+                self.__print()
 
     def debug(self, msgtag = None, msgstr = None):
         "Write all messages, including debug level"
@@ -922,14 +961,14 @@ class DisplayMessages():
                 self.__write_msg(self.LOG_DEBUG, msgtag)
         else:
             if( self.level >= self.LOG_DEBUG ):
-                print()
+                self.__print()
 
 class SecurityAnnouncement():
     "Security announcement class"
     IDX_LAST = -1
     IDX_FIRST = 0
 
-    def __init__(self, _msg, _config, url_date, _file, _version):
+    def __init__(self, _msg, _config, url_date, _file, _version, _record=None, _path='', _content=None):
         if not _config.has_option("Common", "author"):
             print("ERROR: Add 'author' option to [Common] section in the configuration file\n")
             sys.exit(5)
@@ -940,43 +979,73 @@ class SecurityAnnouncement():
         self.bin_version = _version
         self.file = _file
         self.url_date = url_date
-        self.safilepath = self.pat_logs_dir + self.file
+        if _path:
+            self.safilepath = _path
+        else:
+            self.safilepath = self.pat_logs_dir + self.file
         self.sauri = self.url_date + self.file
         self.loaded_file = []
         self.main_package = ''
         self.announcement_id = ''
+        self.rating = ''
         self.package_lists = []
         self.this_package_list = {}
         self.patterns_created = {}
         self.stat = {'patterns_evaluated': 0, 'patterns_generated': 0, 'patterns_duplicated': 0, 'a_errors': 0, 'p_errors': 0}
-        self.__load_file()
-        self.__get_metadata()
-        self.__get_package_lists()
+        if _record:
+            self.__load_record(_record)
+        else:
+            if _content is None:
+                self.__load_file()
+            else:
+                self.loaded_file = list(_content)
+            self.__get_metadata()
+            self.__get_package_lists()
 
     def __str__(self):
         return 'class %s(\n  package_lists=%r \n  safilepath=%r \n  sauri=%r \n  main_package=%r \n  announcement_id=%r \n  rating=%r\n)' % (self.__class__.__name__,self.package_lists, self.safilepath, self.sauri, self.main_package, self.announcement_id, self.rating)
 
     def __load_file(self):
         self.msg.debug('Loading file', self.safilepath)
+        if not os.path.exists(self.safilepath):
+            month = os.path.basename(self.url_date.rstrip('/'))
+            if month:
+                content = AnnouncementStore(self.msg, self.pat_logs_dir, month).read(self.file)
+                if content is not None:
+                    self.msg.debug('Loading from store', month)
+                    self.safilepath = AnnouncementStore.get_path(self.pat_logs_dir, month) + ":" + self.file
+                    f = io.StringIO(content.decode('utf-8', errors='replace'))
+                    self.__read_lines(f)
+                    return
         try:
             f = open(self.safilepath, "r")
         except Exception as error:
             self.msg.min("ERROR: Cannot open", str(self.safilepath) + ": " + str(error))
             self.stat['a_errors'] += 1
             sys.exit()
+        self.__read_lines(f)
 
+    def __read_lines(self, f):
         invalid = re.compile(r'>Object not found!<', re.IGNORECASE)
         for line in f.readlines():
             line = line.strip("\n")
             if invalid.search(line):
                 self.loaded_file = []
-                self.msg.min("ERROR: Invalid file", str(safilepath))
+                self.msg.min("ERROR: Invalid file", str(self.safilepath))
                 self.stat['a_errors'] += 1
                 f.close()
                 sys.exit()
             self.loaded_file.append(line)
         f.close()
 
+    def __load_record(self, record):
+        "Loads the announcement from a catalog record instead of the HTML file"
+        self.msg.debug('Loading record', record['announcement_id'])
+        self.main_package = record['main_package']
+        self.announcement_id = record['announcement_id']
+        self.rating = record['rating']
+        self.package_lists = record['package_lists']
+
     def __get_metadata(self):
         "Pulls the package name, announcement ID and rating"
         suse_update = re.compile("SUSE Security Update:|# Security update for ", re.IGNORECASE)
@@ -1215,15 +1284,18 @@ class SecurityAnnouncement():
         # Write the content to a pattern on disk
         pattern_file = self.pat_dir + pattern_filename
         self.stat['patterns_evaluated'] += 1
-        if( os.path.exists(pattern_file) ):
+        try:
+            # Exclusive creation keeps duplicate detection correct when announcements are processed in parallel
+            f = open(pattern_file, "x")
+        except FileExistsError:
             self.msg.debug('Pattern', str(pattern_filename) + " (" +  str(len(self.package_lists[distro_index]['packages'])) + " packages)")
             self.msg.debug("ERROR Duplicate", "Pattern " + pattern_file)
             self.stat['patterns_duplicated'] += 1
-#            cleanUp()
-    #        sys.exit(4)
+        except Exception as error:
+            self.msg.verbose(" + ERROR: Cannot create " + str(pattern_file) + ": " + str(error))
+            self.stat['p_errors'] += 1
         else:
             try:
-                f = open(pattern_file, "w")
                 f.write(CONTENT)
                 f.close()
                 os.chmod(pattern_file, 0o755)
@@ -1234,6 +1306,11 @@ class SecurityAnnouncement():
                 self.msg.verbose(" + ERROR: Cannot create " + str(pattern_file) + ": " + str(error))
                 self.stat['p_errors'] += 1
 
+    def count_consolidated(self, create_list):
+        "Counts the package lists added to the consolidated driver patterns as generated patterns"
+        self.stat['patterns_evaluated'] += len(create_list)
+        self.stat['patterns_generated'] += len(create_list)
+
     def get_stats(self):
         "Return the class statistics"
         self.msg.debug("Stats", str(self.stat))
@@ -1244,6 +1321,13 @@ class SecurityAnnouncement():
         self.msg.debug("Patterns", str(self.patterns_created))
         return self.patterns_created
 
+    def get_record(self):
+        "Return the normalized announcement data as stored in the security catalog"
+        record = {'announcement_id': self.announcement_id, 'rating': self.rating, 'main_package': self.main_package, 'file': self.file, 'url': self.sauri, 'package_lists': []}
+        for package_list in self.package_lists:
+            record['package_lists'].append({'label': package_list['label'], 'major': package_list['major'], 'minor': package_list['minor'], 'ltss': package_list['ltss'], 'tag': package_list['tag'], 'archs': list(package_list['archs']), 'packages': dict(package_list['packages'])})
+        return record
+
     def get_list(self, regexstr):
         "Return a list of indeces for the matching package list(s) based on the regex expression given. The regex ignores case."
         getdistro = re.compile(regexstr, re.IGNORECASE)
@@ -1259,422 +1343,2427 @@ class SecurityAnnouncement():
             for i in create_list:
                 self.__create_pattern(i, pattern_tag)
 
-class GitHubRepository():
-    """Creates an instance of a GitHub repository. _path must be a valid GitHub repository"""
-    def __init__(self, _msg, _path):
+class AnnouncementStore():
+    "Per-month compressed archive of the downloaded security announcement files in the logs directory"
+
+    def __init__(self, _msg, pat_logs_dir, url_date):
         self.msg = _msg
-        self.path = _path
-        self.info = {'name': os.path.basename(self.path), 'valid': True, 'origin': '', 'origin_id': '', 'branch': '', 'branch_commit': '', 'remote_branch': '', 'remote_branch_commit': '', 'outdated': True, 'state': '', 'content': '', 'branches': '', 'show_branch': '', 'log': '', 'diff': '', 'spec_ver': 'Unknown', 'spec_ver_bumped': 'Unknown'}
-        self.git_config_file = self.path + "/.git/config"
-        self.spec_file = self.path + '/spec/' + self.info['name'] + ".spec"
-        self.uncommitted_patterns = {}
-        self.committed_patterns = {}
-        self.local_sa_patterns = {}
-        self.local_regular_patterns = {}
-        if not self.__probe_repo_info():
-            return
-        self.parse_local_patterns()
+        self.path = self.get_path(pat_logs_dir, url_date)
 
-    def __str__ (self):
-        pattern = '''
-Class instance of {}
-  name = {}
-  branch = {}
-  branch_commit = {}
-  remote_branch = {}
-  remote_branch_commit = {}
-  valid = {}
-  outdated = {}
-  state = {}
-  spec_ver = {}
-  spec_ver_bumped = {}
-  content = {}\n
-  branches = {}\n
-  show_branch = {}\n
-  log = {}\n
-  diff = {}\n
-'''
-        return pattern.format(self.__class__.__name__, self.info['name'], self.info['branch'], self.info['branch_commit'], self.info['remote_branch'], self.info['remote_branch_commit'], self.info['valid'], self.info['outdated'], self.info['state'], self.info['spec_ver'], self.info['spec_ver_bumped'], self.info['content'], self.info['branches'], self.info['show_branch'], self.info['log'], self.info['diff'])
+    def __str__(self):
+        return 'class %s(\n  path=%r\n)' % (self.__class__.__name__, self.path)
 
-    def __evaluate_state(self):
-        self.msg.verbose("Evaluating repository state")
-        this_status = re.compile("nothing to commit, working tree clean", re.IGNORECASE)
-        for line in self.info['content']:
-            if this_status.search(line):
-                if self.info['remote_branch']:
-                    if self.info['branch_commit'] == self.info['remote_branch_commit']:
-                        self.msg.debug("> Nothing to commit, branch_commit matches remote_branch_commit")
-                        self.info['outdated'] = False
-                        self.info['state'] = "Current"
-                    else:
-                        self.msg.debug("> Nothing to commit, branch_commit does NOT match remote_branch_commit")
-                        self.info['outdated'] = True
-                        self.info['state'] = "Push"
-                else:
-                    self.info['outdated'] = False
-                    self.info['state'] = "Current"
-                    commit_count = 0
-                    for line in self.info['show_branch']:
-                        if self.info['branch_commit'] in line:
-                            commit_count += 1
-                    if commit_count < 2:
-                        self.info['outdated'] = False
-                        self.info['state'] = "Merge"
-        if not self.info['state']:
-            self.msg.debug("> Commit needed")
-            self.info['outdated'] = True
-            self.info['state'] = "Commit"
+    @staticmethod
+    def get_path(pat_logs_dir, url_date):
+        "Returns the archive file name for the given month"
+        return config_entry(pat_logs_dir, '/') + sa_store_prefix + str(url_date) + ".zip"
 
-    def __probe_repo_info(self):
-        self.msg.normal("Probing repository", self.info['name'])
-        IDX_FIRST = 0
-        IDX_LAST = -1
-        IDX_ID = 3
-        # Remote origin
+    def names(self):
+        "Returns the list of stored announcement file names"
         if not os.path.exists(self.path):
-            self.info['valid'] = False
-            self.info['state'] = "Missing"
-            return False
-        elif not os.path.exists(self.git_config_file):
-            self.info['valid'] = False
-            self.info['state'] = "Not Git"
-            return False
-        git_config = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
-        git_config.read(self.git_config_file)
-        self.info['origin'] = config_entry(git_config.get('remote "origin"', "url"))
-        self.info['origin_id'] = self.info['origin'].split('/')[IDX_ID]
-        del git_config
-        self.msg.verbose("+ Remote Origin", self.info['origin'])
-        self.msg.verbose("+ Remote Origin ID", self.info['origin_id'])
-
-        if os.path.exists(self.spec_file):
-            # Spec file version
-            this_version = ""
-            version = re.compile("^Version:\s.*[0-9]", re.IGNORECASE)
-            fd = open(self.spec_file, "r")
-            lines = fd.readlines()
-            fd.close()
-            for line in lines:
-                if version.search(line):
-                    this_version = line.split()[-1]
-                    break
-
-            self.info['spec_ver'] = this_version
-
-            if( this_version ):
-                parts = this_version.split('.')
-                bumped = str(int(parts[-1]) + 1)
-                parts[-1] = str(bumped)
-                bumped_version = '.'.join(parts)
-                self.info['spec_ver_bumped'] = bumped_version
-                self.msg.verbose("+ Bumping package version", "{0} -> {1}".format(self.info['spec_ver'], self.info['spec_ver_bumped']))
-            else:
-                self.msg.verbose("+ Could not find package version in {0}".format(get_spec_file))
+            return []
+        try:
+            with zipfile.ZipFile(self.path, 'r') as zf:
+                return zf.namelist()
+        except zipfile.BadZipFile as error:
+            self.msg.min("ERROR: Invalid store", str(self.path) + ": " + str(error))
+            return []
+
+    def add(self, name, content):
+        "Adds the announcement content, an announcement already stored is kept as is"
+        with zipfile.ZipFile(self.path, 'a', compression=zipfile.ZIP_DEFLATED) as zf:
+            if name in zf.namelist():
+                self.msg.debug("Already stored", name)
+                return False
+            zf.writestr(name, content)
+        self.msg.debug("Stored", self.path + ":" + name)
+        return True
 
-        # Get repo status
-        os.chdir(self.path)
+    def read(self, name):
+        "Returns the stored announcement content as bytes, or None if not stored"
+        if not os.path.exists(self.path):
+            return None
         try:
-            prog = '/usr/bin/git status'
-            p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-        except Exception as e:
-            self.msg.debug('  <status> sp.run Exception: {}'.format(prog))
+            with zipfile.ZipFile(self.path, 'r') as zf:
+                return zf.read(name)
+        except KeyError:
+            return None
+        except zipfile.BadZipFile as error:
+            self.msg.min("ERROR: Invalid store", str(self.path) + ": " + str(error))
+            return None
+
+    def remove(self, names):
+        "Removes the given announcement files from the store, deleting the archive when empty. Returns the number removed."
+        stored = self.names()
+        remove_set = set(names)
+        keep = [name for name in stored if name not in remove_set]
+        removed = len(stored) - len(keep)
+        if( removed == 0 ):
+            return 0
+        if( len(keep) == 0 ):
+            os.remove(self.path)
+            return removed
+        tmp_path = self.path + ".tmp"
+        with zipfile.ZipFile(self.path, 'r') as zin:
+            with zipfile.ZipFile(tmp_path, 'w', compression=zipfile.ZIP_DEFLATED) as zout:
+                for name in keep:
+                    zout.writestr(zin.getinfo(name), zin.read(name))
+        os.replace(tmp_path, self.path)
+        return removed
+
+class SecurityCatalog():
+    """Persistent and indexed catalog of the package lists parsed from security announcements"""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS announcements (
+            announcement_id TEXT PRIMARY KEY,
+            rating TEXT,
+            main_package TEXT,
+            url_date TEXT,
+            source_url TEXT,
+            file TEXT,
+            updated TEXT
+        );
+        CREATE TABLE IF NOT EXISTS distributions (
+            distribution_id INTEGER PRIMARY KEY,
+            announcement_id TEXT,
+            position INTEGER,
+            label TEXT,
+            major TEXT,
+            minor TEXT,
+            ltss INTEGER,
+            tag TEXT,
+            archs TEXT
+        );
+        CREATE TABLE IF NOT EXISTS packages (
+            distribution_id INTEGER,
+            name TEXT,
+            version TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_announcements_url_date ON announcements (url_date);
+        CREATE INDEX IF NOT EXISTS idx_announcements_main_package ON announcements (main_package COLLATE NOCASE);
+        CREATE INDEX IF NOT EXISTS idx_distributions_announcement ON distributions (announcement_id);
+        CREATE INDEX IF NOT EXISTS idx_distributions_version ON distributions (major, minor, ltss);
+        CREATE INDEX IF NOT EXISTS idx_packages_name ON packages (name);
+        CREATE INDEX IF NOT EXISTS idx_packages_distribution ON packages (distribution_id);
+    """
+
+    def __init__(self, _msg, _config, _path = ''):
+        self.msg = _msg
+        if _path:
+            self.path = _path
+        else:
+            base_dir = config_entry(_config.get("Security", "base_dir"), '/')
+            self.path = config_option(_config, "Security", "sa_catalog", base_dir + sa_catalog_filename)
+        self.msg.debug("Security catalog", self.path)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(self.SCHEMA)
 
-            if( self.msg.get_level() >= self.msg.LOG_NORMAL ):
-                self.msg.normal()
-                print(str(e) + "\n")
-                separator_line('-')
-                print()
-            return self.info
+    def __str__(self):
+        return 'class %s(\n  path=%r\n)' % (self.__class__.__name__, self.path)
 
-        if p.returncode > 0:
-            self.msg.debug("  <status> Non-Zero return code, p.returncode > 0")
-        else:
-            this_branch = re.compile("On branch", re.IGNORECASE)
-            data = p.stdout.splitlines()
-            self.msg.debug("<> Command Output", prog)
-            for line in data:
-                self.msg.debug("> " + line)
-                if this_branch.search(line):
-                    self.info['branch'] = line.split()[-1]
-            self.info['content'] = data
+    def close(self):
+        self.db.close()
 
-        # git branch -a
-        remote_branch = "remotes/origin/" + self.info['branch']
-        try:
-            prog = '/usr/bin/git --no-pager branch -a'
-            p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-        except Exception as e:
-            self.msg.debug('  <branch> sp.run Exception: {}'.format(prog))
+    def add_announcement(self, security, url_date):
+        "Adds or replaces the announcement data from the SecurityAnnouncement instance given"
+        return self.add_record(security.get_record(), url_date)
+
+    def add_record(self, record, url_date):
+        "Adds or replaces the announcement data from a SecurityAnnouncement record"
+        if not record['announcement_id']:
+            self.msg.debug("Catalog skipped, missing announcement ID", record['file'])
+            return False
+        source_url = record['url'][:len(record['url']) - len(record['file'])]
+        with self.db:
+            self.__delete_announcement(record['announcement_id'])
+            self.db.execute("INSERT INTO announcements VALUES (?, ?, ?, ?, ?, ?, ?)", (record['announcement_id'], record['rating'], record['main_package'], url_date, source_url, record['file'], datetime.datetime.today().strftime("%Y-%m-%d %H:%M:%S")))
+            position = 0
+            for package_list in record['package_lists']:
+                cursor = self.db.execute("INSERT INTO distributions (announcement_id, position, label, major, minor, ltss, tag, archs) VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (record['announcement_id'], position, package_list['label'], str(package_list['major']), str(package_list['minor']), int(package_list['ltss']), package_list['tag'], ' '.join(package_list['archs'])))
+                self.db.executemany("INSERT INTO packages VALUES (?, ?, ?)", [(cursor.lastrowid, name, version) for name, version in package_list['packages'].items()])
+                position += 1
+        self.msg.debug("Catalog updated", record['announcement_id'])
+        return True
 
-            if( self.msg.get_level() >= self.msg.LOG_NORMAL ):
-                self.msg.normal()
-                print(str(e) + "\n")
-                separator_line('-')
-                print()
-            return self.info
+    def __delete_announcement(self, announcement_id):
+        self.db.execute("DELETE FROM packages WHERE distribution_id IN (SELECT distribution_id FROM distributions WHERE announcement_id = ?)", (announcement_id,))
+        self.db.execute("DELETE FROM distributions WHERE announcement_id = ?", (announcement_id,))
+        self.db.execute("DELETE FROM announcements WHERE announcement_id = ?", (announcement_id,))
+
+    def get_url_dates(self):
+        "Return the sorted list of announcement months in the catalog"
+        return [row[0] for row in self.db.execute("SELECT DISTINCT url_date FROM announcements ORDER BY url_date")]
+
+    def get_records(self, url_date = '', announcement_id = ''):
+        "Return a list of announcement records, optionally limited to a month or announcement ID"
+        sql = "SELECT announcement_id, rating, main_package, url_date, source_url, file FROM announcements"
+        args = []
+        if url_date:
+            sql += " WHERE url_date = ?"
+            args.append(url_date)
+        elif announcement_id:
+            sql += " WHERE announcement_id = ?"
+            args.append(announcement_id)
+        sql += " ORDER BY url_date, file"
+        records = []
+        for row in self.db.execute(sql, args).fetchall():
+            record = {'announcement_id': row[0], 'rating': row[1], 'main_package': row[2], 'url_date': row[3], 'source_url': row[4], 'file': row[5], 'url': row[4] + row[5], 'package_lists': []}
+            for dist in self.db.execute("SELECT distribution_id, label, major, minor, ltss, tag, archs FROM distributions WHERE announcement_id = ? ORDER BY position", (row[0],)).fetchall():
+                packages = {}
+                for name, version in self.db.execute("SELECT name, version FROM packages WHERE distribution_id = ?", (dist[0],)):
+                    packages[name] = version
+                record['package_lists'].append({'label': dist[1], 'major': dist[2], 'minor': dist[3], 'ltss': bool(dist[4]), 'tag': dist[5], 'archs': dist[6].split(), 'packages': packages})
+            records.append(record)
+        return records
+
+    def query(self, package = '', main_package = '', distro = '', announcement_id = '', rating = ''):
+        "Return matching (announcement_id, rating, main_package, label, major, minor, ltss, package, version) rows. Package names accept * wildcards."
+        sql = "SELECT a.announcement_id, a.rating, a.main_package, d.label, d.major, d.minor, d.ltss, p.name, p.version FROM packages p JOIN distributions d ON p.distribution_id = d.distribution_id JOIN announcements a ON a.announcement_id = d.announcement_id"
+        where = []
+        args = []
+        if package:
+            if '*' in package:
+                where.append("p.name LIKE ?")
+                args.append(package.replace('*', '%'))
+            else:
+                where.append("p.name = ?")
+                args.append(package)
+        if main_package:
+            where.append("a.main_package = ? COLLATE NOCASE")
+            args.append(main_package)
+        if distro:
+            major, minor, ltss = parse_distro_version(distro)
+            where.append("d.major = ?")
+            args.append(major)
+            if minor:
+                where.append("d.minor = ?")
+                args.append(minor)
+            if ltss is not None:
+                where.append("d.ltss = ?")
+                args.append(int(ltss))
+        if announcement_id:
+            where.append("a.announcement_id = ?")
+            args.append(announcement_id)
+        if rating:
+            where.append("a.rating = ? COLLATE NOCASE")
+            args.append(rating)
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY a.announcement_id, d.position, p.name"
+        self.msg.debug("Catalog query", sql + " " + str(args))
+        return self.db.execute(sql, args).fetchall()
 
-        if p.returncode > 0:
-            self.msg.debug("  <branch> Non-Zero return code, p.returncode > 0")
+    def get_stats(self):
+        "Return the catalog record counts"
+        stats = {}
+        stats['announcements'] = self.db.execute("SELECT COUNT(*) FROM announcements").fetchone()[0]
+        stats['distributions'] = self.db.execute("SELECT COUNT(*) FROM distributions").fetchone()[0]
+        stats['packages'] = self.db.execute("SELECT COUNT(*) FROM packages").fetchone()[0]
+        stats['months'] = self.db.execute("SELECT COUNT(DISTINCT url_date) FROM announcements").fetchone()[0]
+        stats['ratings'] = dict(self.db.execute("SELECT rating, COUNT(*) FROM announcements GROUP BY rating ORDER BY rating").fetchall())
+        return stats
+
+class ConsolidatedSecurityData():
+    """Collects security announcements into one driver pattern per distribution with the data embedded, and a data file later runs merge with"""
+    def __init__(self, _msg, _config, _version, _pat_dir = ''):
+        self.msg = _msg
+        self.author = config_entry(_config.get("Common", "author"))
+        if _pat_dir:
+            self.pat_dir = _pat_dir
         else:
-            data = p.stdout.splitlines()
-            self.msg.debug("<> Command Output", prog)
-            for line in data:
-                self.msg.debug("> " + line)
-                if remote_branch in line:
-                    self.info['remote_branch'] = remote_branch
-            self.info['branches'] = data
+            self.pat_dir = config_entry(_config.get("Security", "pat_dir"), '/')
+        self.bin_version = _version
+        self.distros = {}
+        self.files_written = {}
 
-        # git show-branch self.info['branch']
-        try:
-            prog = '/usr/bin/git show-branch ' + self.info['branch']
-            p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-        except Exception as e:
-            self.msg.debug('  <show-branch local> sp.run Exception: {}'.format(prog))
+    def __str__(self):
+        return 'class %s(\n  pat_dir=%r \n  distros=%r\n)' % (self.__class__.__name__, self.pat_dir, list(self.distros.keys()))
 
-            if( self.msg.get_level() >= self.msg.LOG_NORMAL ):
-                self.msg.normal()
-                print(str(e) + "\n")
-                separator_line('-')
-                print()
-            return self.info
+    def __get_distro(self, pattern_tag, major, minor, ltss):
+        "Returns the distribution data, loading a previously saved data file to merge with"
+        if ltss:
+            distro_key = "{0}_{1}.{2}.ltss".format(pattern_tag, major, minor)
+        else:
+            distro_key = "{0}_{1}.{2}".format(pattern_tag, major, minor)
+        if distro_key not in self.distros:
+            data_file = self.pat_dir + sa_consolidated_base + "_" + distro_key + ".json"
+            data = {'tag': pattern_tag, 'major': int(major), 'minor': int(minor), 'ltss': bool(ltss), 'announcements': {}}
+            if os.path.exists(data_file):
+                self.msg.debug("Merging data file", data_file)
+                with open(data_file, "r") as f:
+                    saved = json.load(f)
+                for announcement in saved['announcements']:
+                    data['announcements'][announcement['tag']] = announcement
+            self.distros[distro_key] = data
+        return self.distros[distro_key]
+
+    def add_entry(self, pattern_tag, major, minor, ltss, announcement_id, name, severity, url, packages):
+        "Adds one announcement package list to the distribution data"
+        data = self.__get_distro(pattern_tag, major, minor, ltss)
+        # The main package is only checked when the announcement fixes a package by that name
+        main = name if name in packages else ''
+        data['announcements'][announcement_id] = {'tag': announcement_id, 'name': name, 'main': main, 'severity': severity, 'url': url, 'packages': dict(packages)}
+
+    def add_announcement(self, security, create_list, pattern_tag):
+        "Adds the package lists for the given index list of the SecurityAnnouncement instance"
+        self.add_record(security.get_record(), create_list, pattern_tag)
+        security.count_consolidated(create_list)
+
+    def add_record(self, record, create_list, pattern_tag):
+        "Adds the package lists for the given index list of a SecurityAnnouncement record"
+        for i in create_list:
+            package_list = record['package_lists'][i]
+            self.add_entry(pattern_tag, package_list['major'], package_list['minor'], package_list['ltss'], record['announcement_id'], record['main_package'], record['rating'], record['url'], package_list['packages'])
+
+    def __create_driver(self, distro_key, data):
+        TODAY = datetime.date.today()
+        base_indent = '    '
+        if data['ltss']:
+            ltss_str = " LTSS"
+        else:
+            ltss_str = ""
+        CONTENT = "#!/usr/bin/python3\n#\n"
+        CONTENT += "# Title:       Security Announcements for SUSE Linux Enterprise " + str(data['major']) + " SP" + str(data['minor']) + ltss_str + "\n"
+        CONTENT += "# Description: Evaluates all security announcements for " + distro_key + "\n"
+        CONTENT += "# Source:      Security Announcement Generator (sagen.py) v" + str(self.bin_version) + "\n"
+        CONTENT += "# Modified:    " + str(TODAY.strftime("%Y %b %d")) + "\n"
+        CONTENT += "#\n##############################################################################\n"
+        CONTENT += "# Copyright (C) " + str(TODAY.year) + " SUSE LLC\n"
+        CONTENT += "##############################################################################\n#\n"
+        CONTENT += "# This program is free software; you can redistribute it and/or modify\n"
+        CONTENT += "# it under the terms of the GNU General Public License as published by\n"
+        CONTENT += "# the Free Software Foundation; version 2 of the License.\n#\n"
+        CONTENT += "# This program is distributed in the hope that it will be useful,\n"
+        CONTENT += "# but WITHOUT ANY WARRANTY; without even the implied warranty of\n"
+        CONTENT += "# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the\n"
+        CONTENT += "# GNU General Public License for more details.\n#\n"
+        CONTENT += "# You should have received a copy of the GNU General Public License\n"
+        CONTENT += "# along with this program; if not, see <http://www.gnu.org/licenses/>.\n#\n"
+        CONTENT += "#  Authors/Contributors:\n#   " + self.author + "\n#\n"
+        CONTENT += "##############################################################################\n\n"
+        CONTENT += "import os\n"
+        CONTENT += "import Core\n"
+        CONTENT += "import SUSE\n\n"
+        CONTENT += "meta_class = \"Security\"\n"
+        CONTENT += "meta_category = \"SLE\"\n"
+        CONTENT += "meta_component = \"Announcements\"\n"
+        CONTENT += "pattern_filename = os.path.basename(__file__)\n"
+        CONTENT += "primary_link = \"META_LINK_Security\"\n"
+        CONTENT += "overall = Core.TEMP\n"
+        CONTENT += "overall_info = \"NOT SET\"\n"
+        CONTENT += "other_links = \"META_LINK_Security=https://www.suse.com/support/update/\"\n"
+        CONTENT += "Core.init(meta_class, meta_category, meta_component, pattern_filename, primary_link, overall, overall_info, other_links)\n\n"
+        # The data is embedded so the driver can be distributed and run as a single pattern file
+        CONTENT += "data = {'tag': " + repr(data['tag']) + ", 'major': " + repr(data['major']) + ", 'minor': " + repr(data['minor']) + ", 'ltss': " + repr(data['ltss']) + ", 'announcements': [\n"
+        for announcement_id in sorted(data['announcements'].keys()):
+            CONTENT += "    " + repr(data['announcements'][announcement_id]) + ",\n"
+        CONTENT += "]}\n\n"
+        # Core.updateStatus only raises the overall status, so each announcement is checked
+        # from a reset status and the results are reported together
+        CONTENT += "def check_announcement(announcement):\n"
+        CONTENT += base_indent + "Core.OVERALL = Core.TEMP\n"
+        CONTENT += base_indent + "Core.OVERALL_INFO = \"NOT SET\"\n"
+        CONTENT += base_indent + "SUSE.securityAnnouncementPackageCheck(announcement['name'], announcement.get('main', ''), data['ltss'], announcement['severity'], announcement['tag'], announcement['packages'])\n"
+        CONTENT += base_indent + "return Core.OVERALL\n\n"
+        CONTENT += "def main():\n"
+        CONTENT += base_indent + "server = SUSE.getHostInfo()\n\n"
+        CONTENT += base_indent + "if ( server['DistroVersion'] == data['major'] ):\n"
+        CONTENT += base_indent + "    if ( server['DistroPatchLevel'] == data['minor'] ):\n"
+        CONTENT += base_indent + "        applicable = 0\n"
+        CONTENT += base_indent + "        affected = []\n"
+        CONTENT += base_indent + "        other_results = []\n"
+        CONTENT += base_indent + "        for announcement in data['announcements']:\n"
+        CONTENT += base_indent + "            result = check_announcement(announcement)\n"
+        CONTENT += base_indent + "            if ( Core.SUCC <= result <= Core.CRIT ):\n"
+        CONTENT += base_indent + "                applicable += 1\n"
+        CONTENT += base_indent + "                if ( result > Core.SUCC ):\n"
+        CONTENT += base_indent + "                    affected.append((result, announcement))\n"
+        CONTENT += base_indent + "            else:\n"
+        CONTENT += base_indent + "                other_results.append(result)\n"
+        CONTENT += base_indent + "        Core.OVERALL = Core.TEMP\n"
+        CONTENT += base_indent + "        Core.OVERALL_INFO = \"NOT SET\"\n"
+        CONTENT += base_indent + "        if ( len(affected) > 0 ):\n"
+        CONTENT += base_indent + "            worst = max(result for (result, announcement) in affected)\n"
+        CONTENT += base_indent + "            links = [\"META_LINK_Security=\" + affected[0][1]['url']]\n"
+        CONTENT += base_indent + "            links.extend(\"META_LINK_\" + announcement['tag'] + \"=\" + announcement['url'] for (result, announcement) in affected)\n"
+        CONTENT += base_indent + "            Core.OTHER_LINKS = '|'.join(links)\n"
+        CONTENT += base_indent + "            Core.updateStatus(worst, \"Security Announcements: \" + str(len(affected)) + \" of \" + str(applicable) + \" applicable announcements need updates: \" + ', '.join(announcement['tag'] + \" \" + announcement['name'] for (result, announcement) in affected))\n"
+        CONTENT += base_indent + "        elif ( applicable > 0 ):\n"
+        CONTENT += base_indent + "            Core.updateStatus(Core.SUCC, \"Security Announcements: All \" + str(applicable) + \" applicable announcements are installed\")\n"
+        CONTENT += base_indent + "        elif ( len(other_results) > 0 ):\n"
+        CONTENT += base_indent + "            Core.updateStatus(min(other_results), \"Security Announcements: No announcements apply to the installed packages\")\n"
+        CONTENT += base_indent + "        else:\n"
+        CONTENT += base_indent + "            Core.updateStatus(Core.ERROR, \"ERROR: Security Announcements: No announcements found\")\n"
+        CONTENT += base_indent + "    else:\n"
+        CONTENT += base_indent + "        Core.updateStatus(Core.ERROR, \"ERROR: Security Announcements: Outside the service pack scope\")\n"
+        CONTENT += base_indent + "else:\n"
+        CONTENT += base_indent + "    Core.updateStatus(Core.ERROR, \"ERROR: Security Announcements: Outside the distribution scope\")\n\n"
+        CONTENT += base_indent + "Core.printPatternResults()\n\n"
+        CONTENT += "if __name__ == \"__main__\":\n"
+        CONTENT += "    main()\n\n"
+        return CONTENT
+
+    def save(self):
+        "Writes the data file and driver pattern for each distribution collected"
+        for distro_key in sorted(self.distros.keys()):
+            data = self.distros[distro_key]
+            saved = {'tag': data['tag'], 'major': data['major'], 'minor': data['minor'], 'ltss': data['ltss'], 'announcements': []}
+            for announcement_id in sorted(data['announcements'].keys()):
+                saved['announcements'].append(data['announcements'][announcement_id])
+            data_filename = sa_consolidated_base + "_" + distro_key + ".json"
+            driver_filename = sa_consolidated_base + "_" + distro_key + ".py"
+            try:
+                with open(self.pat_dir + data_filename, "w") as f:
+                    json.dump(saved, f, sort_keys=True, separators=(',', ':'))
+                    f.write("\n")
+                with open(self.pat_dir + driver_filename, "w") as f:
+                    f.write(self.__create_driver(distro_key, data))
+                os.chmod(self.pat_dir + driver_filename, 0o755)
+                self.files_written[data_filename] = len(saved['announcements'])
+                self.files_written[driver_filename] = len(saved['announcements'])
+                self.msg.verbose(' + Data File', data_filename + " (" + str(len(saved['announcements'])) + " announcements)")
+            except Exception as error:
+                self.msg.min(" + ERROR: Cannot create " + str(data_filename) + ": " + str(error))
+        return self.files_written
+
+    def get_files(self):
+        "Return the data files and driver patterns written with the number of announcements"
+        return self.files_written
+
+class PatternValidator():
+    "Runs the pat checks for many patterns against the supportconfig archives on a pool of worker threads"
+    REQUIRED_JSON_KEYS = ['generation', 'class', 'category', 'component', 'id', 'primary_solution', 'severity', 'description', 'solution_links']
+    OVERALL = {"-2": "Temporary", "-1": "Partial", "0": "Success", "1": "Recommend", "2": "Promotion", "3": "Warning", "4": "Critical", "5": "Error", "6": "Ignore"}
+    IDX_OVERALL = 5
+    IDX_LAST = -1
 
-        if p.returncode > 0:
-            self.msg.debug("  <show-branch local> Non-Zero return code, p.returncode > 0")
+    def __init__(self, _msg, _config, _workers = 0):
+        self.msg = _msg
+        self.arch_dir = config_entry(_config.get("Common", "sca_arch_dir"), '/')
+        self.lib_dir = config_entry(_config.get("Common", "sca_lib_dir"), '/')
+        if( _workers > 0 ):
+            self.workers = _workers
         else:
-            data = p.stdout.splitlines()
-            self.msg.debug("<> Command Output", prog)
-            for line in data:
-                self.msg.debug("> " + line)
-            self.info['branch_commit'] = data[IDX_FIRST].split(']')[IDX_LAST].strip()
+            try:
+                self.workers = int(config_option(_config, "Security", "validate_workers", '0'))
+            except ValueError:
+                self.workers = 0
+            if( self.workers < 1 ):
+                self.workers = os.cpu_count() or 1
+        # The archives and the library environment are the same for every pattern, so set them up once
+        self.archives = self.__get_archives()
+        self.env = dict(os.environ)
+        self.env['PYTHONPATH'] = self.lib_dir + 'python'
+        self.env['PERL5LIB'] = self.lib_dir + 'perl'
+        self.env['BASHLIB'] = self.lib_dir + 'bash'
+        self.hashpling = re.compile('^#!/')
+        self.validhpls = re.compile('python3$|perl$')
+        self.scapattern_gen1 = re.compile(r'^Core.init\(META_CLASS|^\@PATTERN_RESULTS = \(', re.IGNORECASE)
+        self.scapattern_gen2 = re.compile(r'SCAPatternGen2\(')
+        self.valid_gen1_output = re.compile("^META_CLASS=.*|META_CATEGORY=.*|META_COMPONENT=.*|PATTERN_ID=.*|PRIMARY_LINK=META_LINK_.*|OVERALL=.*|OVERALL_INFO=.*|META_LINK_")
 
-        # git show-branch self.info['remote_branch'] if present
-        if self.info['remote_branch']:
+    def __str__(self):
+        return 'class %s(\n  arch_dir=%r\n  archives=%r\n  lib_dir=%r\n  workers=%r\n)' % (self.__class__.__name__, self.arch_dir, len(self.archives), self.lib_dir, self.workers)
+
+    def __get_archives(self):
+        "Returns the supportconfig archives the same way pat does without recursion"
+        scadir = re.compile("^scc_|^nts_", re.IGNORECASE)
+        if os.path.exists(self.arch_dir + "basic-environment.txt"):
+            return [self.arch_dir.rstrip('/')]
+        if not os.path.isdir(self.arch_dir):
+            return []
+        return sorted([f.path for f in os.scandir(self.arch_dir) if f.is_dir() and scadir.search(f.name)])
+
+    def get_archives(self):
+        return self.archives
+
+    def __check_file(self, pattern, result):
+        "Static pattern checks done once per pattern, returns the pattern generation or 0 when not an SCA pattern"
+        gen_value = 0
+        if not os.access(pattern, os.X_OK):
+            result['errors'].append("Missing execute permission")
+        with open(pattern, 'rb') as f:
+            bindata = f.read()
+        if b'\x0d\x0a' in bindata:
+            result['errors'].append("Detected DOS file format, use dos2unix to convert")
+        hpl = ''
+        for binline in bindata.splitlines():
+            line = binline.decode('ascii', errors='replace')
+            if self.hashpling.search(line):
+                hpl = line[2:].split()[0] #drop the #!, keep the path
+            if self.scapattern_gen1.search(line):
+                gen_value = 1
+                break
+            if self.scapattern_gen2.search(line):
+                gen_value = 2
+                break
+        if( gen_value == 0 ):
+            result['errors'].append("Not an SCA Pattern")
+            return gen_value
+        if not ( len(hpl) > 0 and os.path.exists(hpl) and self.validhpls.search(hpl) ):
+            result['errors'].append("Missing or invalid hash pling")
+        return gen_value
+
+    def __run_archive(self, pattern, gen_value, archive):
+        "Runs the pattern against one archive, returns the status string and an error string"
+        if( gen_value == 2 ):
+            cmd = [pattern, archive]
+        else:
+            cmd = [pattern, '-p', archive]
+        try:
+            p = sp.run(cmd, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE, env=self.env)
+        except Exception as error:
+            return ('Fatal', "Pattern execution error: " + str(error))
+        if( p.returncode > 0 ):
+            return ('Fatal', "Pattern execution error, pattern returned non-zero")
+        try:
+            json_object = json.loads(p.stdout)
+        except ValueError:
+            json_object = None
+        if json_object is not None:
+            if not isinstance(json_object, dict):
+                return ('Fatal', "Invalid generation 2 JSON output string, review Pattern Requirements")
+            missing_json_keys = [key for key in self.REQUIRED_JSON_KEYS if key not in json_object]
+            if( len(missing_json_keys) > 0 ):
+                return ('Fatal', "Invalid generation 2 JSON output string, review Pattern Requirements")
+            return (self.OVERALL.get(str(json_object['severity']), 'Fatal'), '')
+        elif( gen_value == 1 and self.valid_gen1_output.search(p.stdout) ):
+            if( len(p.stdout.splitlines()) > 1 ):
+                return ('Fatal', "Invalid generation 1 pattern output string, review Pattern Requirements")
             try:
-                prog = '/usr/bin/git show-branch ' + self.info['remote_branch']
-                p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-            except Exception as e:
-                self.msg.debug('  <show-branch remote> sp.run Exception: {}'.format(prog))
-
-                if( self.msg.get_level() >= self.msg.LOG_NORMAL ):
-                    self.msg.normal()
-                    print(str(e) + "\n")
-                    separator_line('-')
-                    print()
-                return self.info
-
-            if p.returncode > 0:
-                self.msg.debug("  <show-branch remote> Non-Zero return code, p.returncode > 0")
-            else:
-                data = p.stdout.splitlines()
-                self.msg.debug("<> Command Output", prog)
-                for line in data:
-                    self.msg.debug("> " + line)
-                self.info['remote_branch_commit'] = data[IDX_FIRST].split(']')[IDX_LAST].strip()
+                overall = p.stdout.split('|')[self.IDX_OVERALL].split("=")[self.IDX_LAST].strip()
+            except IndexError:
+                return ('Fatal', "Invalid generation 1 pattern output string, review Pattern Requirements")
+            return (self.OVERALL.get(overall, 'Fatal'), '')
+        elif( gen_value == 2 ):
+            return ('Fatal', "Invalid generation 2 JSON output string, review Pattern Requirements")
+        return ('Fatal', "Invalid pattern output string, review Pattern Requirements")
+
+    def check_pattern(self, pattern):
+        "Returns the validation result of one pattern against all the archives"
+        result = {'pattern': pattern, 'valid': False, 'errors': [], 'archives': {}}
+        try:
+            gen_value = self.__check_file(pattern, result)
+        except Exception as error:
+            result['errors'].append("Cannot read pattern: " + str(error))
+            return result
+        if( gen_value == 0 ):
+            return result
+        for archive in self.archives:
+            (status, error) = self.__run_archive(pattern, gen_value, archive)
+            result['archives'][archive] = status
+            if error and error not in result['errors']:
+                result['errors'].append(error)
+        result['valid'] = ( len(result['errors']) == 0 )
+        return result
+
+    def validate(self, patterns):
+        "Validates the patterns on the worker pool, yielding each result as it completes"
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self.check_pattern, pattern) for pattern in patterns]
+            for future in concurrent.futures.as_completed(futures):
+                yield future.result()
+
+class PatternIndex():
+    """Persistent index of the files in each pattern repository, refreshed from the git HEAD commit and working tree
+
+    _state_keys maps repository names to the GitHubRepository state key of a probe, the files
+    of a repository are reused without running git while its state key is unchanged.
+    """
+    INDEX_VERSION = 2
+
+    def __init__(self, _msg, _config, _refresh = True, _state_keys = None):
+        self.msg = _msg
+        self.repo_dir = config_entry(_config.get("Common", "sca_repo_dir"), '/')
+        self.cache_dir = get_cache_dir(_config)
+        self.path = self.cache_dir + pattern_index_filename
+        self.cache = {'version': self.INDEX_VERSION, 'repos': {}}
+        self.files = {}
+        self.names = set()
+        self.__load()
+        if _refresh:
+            self.refresh(_state_keys)
 
-        
-        # git show-branches
+    def __str__(self):
+        return 'class %s(\n  path=%r\n  repo_dir=%r\n  repos=%r\n  files=%r\n)' % (self.__class__.__name__, self.path, self.repo_dir, len(self.files), len(self.names))
+
+    def __load(self):
+        if not os.path.exists(self.path):
+            return
         try:
-            prog = '/usr/bin/git show-branch'
-            p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-        except Exception as e:
-            self.msg.debug('  <show-branch all> sp.run Exception: {}'.format(prog))
+            with open(self.path, "r") as f:
+                cache = json.load(f)
+        except Exception as error:
+            self.msg.verbose("Ignoring invalid pattern index", str(self.path) + ": " + str(error))
+            return
+        if( cache.get('version') == self.INDEX_VERSION ):
+            self.cache = cache
 
-            if( self.msg.get_level() >= self.msg.LOG_NORMAL ):
-                self.msg.normal()
-                print(str(e) + "\n")
-                separator_line('-')
-                print()
-            return self.info
+    def __save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.cache, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except Exception as error:
+            self.msg.verbose("Cannot save pattern index", str(self.path) + ": " + str(error))
 
+    def __git(self, path, args):
+        "Returns the git command output as a list of NUL separated fields, or None on failure"
+        try:
+            p = sp.run(['/usr/bin/git'] + args, cwd=path, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+        except Exception as error:
+            self.msg.debug('  <PatternIndex> sp.run Exception', str(error))
+            return None
         if p.returncode > 0:
-            self.msg.debug("  <show-branch all> Non-Zero return code, p.returncode > 0")
+            self.msg.debug('  <PatternIndex> Non-Zero return code', ' '.join(args) + ": " + p.stderr.strip())
+            return None
+        return [field for field in p.stdout.split('\0') if field]
+
+    def __walk(self, path):
+        "Returns the relative file paths of a directory that is not a git repository, skipping any .git directory"
+        found = set()
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d != '.git']
+            for name in files:
+                found.add(os.path.relpath(os.path.join(root, name), path))
+        return found
+
+    def __tracked_files(self, name, path):
+        "Returns the files committed at HEAD, updated from the cached commit with a diff when possible"
+        head = self.__git(path, ['rev-parse', '--verify', '-q', 'HEAD'])
+        head = head[0].strip() if head else ''
+        cached = self.cache['repos'].get(name, {})
+        if not head:
+            tracked = set()
+        elif( cached.get('head') == head ):
+            self.msg.debug("  <PatternIndex> Unchanged", name)
+            return (head, set(cached['tracked']))
         else:
-            data = p.stdout.splitlines()
-            self.msg.debug("<> Command Output", prog)
-            self.info['show_branch'] = []
-            for line in data:
-                self.msg.debug("=> " + line)
-                if line.startswith('-'):
-                    break
+            tracked = None
+            if cached.get('head'):
+                diff = self.__git(path, ['diff', '--name-status', '-z', '--no-renames', cached['head'], head])
+                if diff is not None:
+                    self.msg.debug("  <PatternIndex> Updating from diff", name)
+                    tracked = set(cached['tracked'])
+                    for status, filename in zip(diff[0::2], diff[1::2]):
+                        if status.startswith('D'):
+                            tracked.discard(filename)
+                        else:
+                            tracked.add(filename)
+            if tracked is None:
+                self.msg.debug("  <PatternIndex> Listing HEAD", name)
+                tracked = set(self.__git(path, ['ls-tree', '-r', '-z', '--name-only', 'HEAD']) or [])
+        self.cache['repos'][name] = {'head': head, 'tracked': sorted(tracked)}
+        return (head, tracked)
+
+    def __worktree_files(self, path, tracked):
+        "Applies the uncommitted additions and deletions of the working tree to the tracked files"
+        files = set(tracked)
+        status = self.__git(path, ['status', '--porcelain', '-z', '--untracked-files=all', '--no-renames'])
+        for entry in status or []:
+            code = entry[:2]
+            filename = entry[3:]
+            if 'D' in code:
+                files.discard(filename)
+            else:
+                files.add(filename)
+        return files
+
+    def refresh(self, _state_keys = None):
+        "Brings the index up to date with the repositories found in sca_repo_dir"
+        state_keys = _state_keys or {}
+        self.files = {}
+        present = set()
+        if os.path.isdir(self.repo_dir):
+            for entry in sorted(os.scandir(self.repo_dir), key=lambda e: e.name):
+                if not entry.is_dir():
+                    continue
+                present.add(entry.name)
+                if os.path.exists(os.path.join(entry.path, '.git')):
+                    state_key = state_keys.get(entry.name)
+                    cached = self.cache['repos'].get(entry.name, {})
+                    if( state_key is not None and cached.get('key') == state_key ):
+                        self.msg.debug("  <PatternIndex> Unchanged state", entry.name)
+                        self.files[entry.name] = set(cached['files'])
+                        continue
+                    (head, tracked) = self.__tracked_files(entry.name, entry.path)
+                    self.files[entry.name] = self.__worktree_files(entry.path, tracked)
+                    if state_key is not None:
+                        self.cache['repos'][entry.name].update({'key': state_key, 'files': sorted(self.files[entry.name])})
                 else:
-                    self.info['show_branch'].append(line)
+                    self.files[entry.name] = self.__walk(entry.path)
+        for name in list(self.cache['repos'].keys()):
+            if name not in present:
+                del self.cache['repos'][name]
+        self.names = set()
+        for files in self.files.values():
+            self.names.update(os.path.basename(filename) for filename in files)
+        self.__save()
+        self.msg.debug("Pattern index", str(self))
+
+    def contains(self, filename):
+        "Returns True if any repository has a file with the base name of filename"
+        return os.path.basename(filename) in self.names
+
+    def get_names(self):
+        return self.names
+
+    def get_files(self, repo = ''):
+        "Returns the sorted absolute paths of the indexed files, for one repository if given"
+        paths = []
+        for name, files in self.files.items():
+            if repo and name != repo:
+                continue
+            paths.extend(self.repo_dir + name + '/' + filename for filename in files)
+        return sorted(paths)
+
+    def get_pattern_files(self, repo = ''):
+        "Returns the indexed python and perl files found in a patterns directory"
+        include_file = re.compile(r"(^|/)patterns/.*\.(py|pl)$")
+        paths = []
+        for name, files in self.files.items():
+            if repo and name != repo:
+                continue
+            paths.extend(self.repo_dir + name + '/' + filename for filename in files if include_file.search(filename))
+        return sorted(paths)
 
-        # git log
-        try:
-            prog = '/usr/bin/git --no-pager log'
-            p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-        except Exception as e:
-            self.msg.debug('  <log> sp.run Exception: {}'.format(prog))
+class StatusSnapshot():
+    "Cached scandir snapshot of the security pattern directories and supportconfig archives, keyed on directory mtimes"
+    SNAPSHOT_VERSION = 1
+    ARCHIVE_FILE = "basic-environment.txt"
 
-            if( self.msg.get_level() >= self.msg.LOG_NORMAL ):
-                self.msg.normal()
-                print(str(e) + "\n")
-                separator_line('-')
-                print()
-            return self.info
+    def __init__(self, _msg, _config):
+        self.msg = _msg
+        self.repo_dir = os.path.normpath(config_entry(_config.get("Common", "sca_repo_dir")))
+        self.dirs = {
+            'patterns': config_entry(_config.get("Security", "pat_dir"), '/'),
+            'duplicates': config_entry(_config.get("Security", "pat_dups"), '/'),
+            'logs': config_entry(_config.get("Security", "pat_logs"), '/'),
+            'errors': config_entry(_config.get("Security", "pat_error"), '/'),
+            'archives': config_entry(_config.get("Common", "sca_arch_dir"), '/'),
+        }
+        self.path = get_cache_dir(_config) + status_snapshot_filename
+        self.mtimes = {}
+        self.files = {}
+        if not self.__load():
+            self.refresh()
 
-        if p.returncode > 0:
-            self.msg.debug("  <log> Non-Zero return code, p.returncode > 0")
-        else:
-            data = p.stdout.splitlines()
-            self.msg.debug("<> Command Output", prog)
-            for line in data:
-                self.msg.debug("> " + line)
-            self.info['log'] = data
+    def __str__(self):
+        return 'class %s(\n  path=%r\n  dirs=%r\n  files=%r\n)' % (self.__class__.__name__, self.path, len(self.mtimes), {key: len(value) for key, value in self.files.items()})
 
-        # git diff
+    def __load(self):
+        "Uses the cached snapshot when none of the scanned directories changed"
+        if not os.path.exists(self.path):
+            return False
         try:
-            prog = '/usr/bin/git --no-pager diff'
-            p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-        except Exception as e:
-            self.msg.debug('  <diff> sp.run Exception: {}'.format(prog))
+            with open(self.path, "r") as f:
+                cache = json.load(f)
+        except Exception as error:
+            self.msg.verbose("Ignoring invalid status snapshot", str(self.path) + ": " + str(error))
+            return False
+        if( cache.get('version') != self.SNAPSHOT_VERSION or cache.get('dirs') != self.dirs ):
+            return False
+        for path, mtime in cache['mtimes'].items():
+            try:
+                if( os.stat(path).st_mtime_ns != mtime ):
+                    self.msg.debug("  <StatusSnapshot> Changed", path)
+                    return False
+            except OSError:
+                return False
+        self.mtimes = cache['mtimes']
+        self.files = cache['files']
+        self.msg.debug("  <StatusSnapshot> Using cache", self.path)
+        return True
+
+    def __save(self):
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({'version': self.SNAPSHOT_VERSION, 'dirs': self.dirs, 'mtimes': self.mtimes, 'files': self.files}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except Exception as error:
+            self.msg.verbose("Cannot save status snapshot", str(self.path) + ": " + str(error))
+
+    def __scandir(self, path):
+        "Returns the directory entries and records the directory mtime, or an empty list if it cannot be read"
+        try:
+            self.mtimes[path] = os.stat(path).st_mtime_ns
+            return list(os.scandir(path))
+        except OSError:
+            return []
+
+    def __prune(self, entry):
+        return ( entry.name == '.git' or os.path.normpath(entry.path) == self.repo_dir )
+
+    def __scan_files(self, top):
+        found = []
+        stack = [top.rstrip('/')]
+        while stack:
+            for entry in self.__scandir(stack.pop()):
+                if entry.is_dir(follow_symlinks=False):
+                    if not self.__prune(entry):
+                        stack.append(entry.path)
+                else:
+                    found.append(entry.path)
+        return sorted(found)
+
+    def __scan_archives(self, top):
+        "Returns the supportconfig directories, without descending into a supportconfig once found"
+        found = []
+        stack = [top.rstrip('/')]
+        while stack:
+            path = stack.pop()
+            entries = self.__scandir(path)
+            if any(entry.name == self.ARCHIVE_FILE for entry in entries):
+                found.append(path)
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False) and not self.__prune(entry):
+                    stack.append(entry.path)
+        return sorted(found)
+
+    def refresh(self):
+        self.mtimes = {}
+        self.files = {}
+        for name, path in self.dirs.items():
+            if( name == 'archives' ):
+                self.files[name] = self.__scan_archives(path)
+            else:
+                self.files[name] = self.__scan_files(path)
+        self.__save()
+        self.msg.debug("Status snapshot", str(self))
+
+    def get_files(self, name):
+        "Returns the files of the named directory: patterns, duplicates, logs, errors or archives"
+        return self.files.get(name, [])
+
+class PatternContentIndex():
+    """Pattern file content of the repositories in sca_repo_dir, read from git and cached by blob id
+
+    Without _ref the index follows the working tree: staged blobs come from git and
+    modified or untracked files are read from disk. With _ref, like origin/HEAD, the
+    files committed at that ref are indexed without touching the working tree. Each
+    repository streams the blobs missing from the cache through one git cat-file --batch
+    process, so unchanged blobs are never read again. The blob ids of every ref are kept,
+    a blob no ref references anymore is removed after the refresh.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS blobs (
+            sha TEXT PRIMARY KEY,
+            content BLOB
+        );
+        CREATE TABLE IF NOT EXISTS refs (
+            ref TEXT,
+            sha TEXT,
+            PRIMARY KEY (ref, sha)
+        );
+    """
+    PATTERN_FILE = re.compile(r"(^|/)patterns/.*\.(py|pl)$")
+
+    def __init__(self, _msg, _config, _ref = ''):
+        self.msg = _msg
+        self.ref = _ref
+        self.repo_dir = config_entry(_config.get("Common", "sca_repo_dir"), '/')
+        self.path = get_cache_dir(_config) + pattern_content_filename
+        self.entries = {}
+        self.blobs_read = 0
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(self.SCHEMA)
+        self.refresh()
 
-            if( self.msg.get_level() >= self.msg.LOG_NORMAL ):
-                self.msg.normal()
-                print(str(e) + "\n")
-                separator_line('-')
-                print()
-            return self.info
+    def __str__(self):
+        return 'class %s(\n  path=%r\n  repo_dir=%r\n  ref=%r\n  entries=%r\n  blobs_read=%r\n)' % (self.__class__.__name__, self.path, self.repo_dir, self.ref, len(self.entries), self.blobs_read)
 
+    def __git(self, path, args):
+        "Returns the git command output as a list of NUL separated fields, or None on failure"
+        try:
+            p = sp.run(['/usr/bin/git'] + args, cwd=path, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+        except Exception as error:
+            self.msg.debug('  <PatternContentIndex> sp.run Exception', str(error))
+            return None
         if p.returncode > 0:
-            self.msg.debug("  <diff> Non-Zero return code, p.returncode > 0")
+            self.msg.debug('  <PatternContentIndex> Non-Zero return code', ' '.join(args) + ": " + p.stderr.strip())
+            return None
+        return [field for field in p.stdout.split('\0') if field]
+
+    def __list_blobs(self, path):
+        "Returns the pattern files of a repository with their blob id, or None for files read from disk"
+        files = {}
+        if self.ref:
+            listing = self.__git(path, ['ls-tree', '-r', '-z', '--full-tree', self.ref])
+            if listing is None:
+                self.msg.verbose("+ Unknown git reference in " + os.path.basename(path), self.ref)
+                return files
+            for entry in listing:
+                (info, filename) = entry.split('\t', 1)
+                (mode, kind, sha) = info.split()
+                if kind == 'blob' and self.PATTERN_FILE.search(filename):
+                    files[filename] = sha
         else:
-            data = p.stdout.splitlines()
-            self.msg.debug("<> Command Output", prog)
-            for line in data:
-                self.msg.debug("> " + line)
-            self.info['diff'] = data
-
-        self.__evaluate_state()
-        if( len(self.info['origin']) == 0 ):
-            self.info['valid'] = False
-        if( len(self.info['branch']) == 0 ):
-            self.info['valid'] = False
-        if( len(self.info['show_branch']) == 0 ):
-            self.info['valid'] = False
-        if( len(self.info['content']) == 0 ):
-            self.info['valid'] = False
+            for entry in self.__git(path, ['ls-files', '-s', '-z']) or []:
+                (info, filename) = entry.split('\t', 1)
+                (mode, sha, stage) = info.split()
+                if self.PATTERN_FILE.search(filename) and mode != '160000':
+                    files[filename] = sha
+            changed = (self.__git(path, ['diff-files', '--name-only', '-z']) or []) + (self.__git(path, ['ls-files', '-o', '--exclude-standard', '-z']) or [])
+            for filename in changed:
+                if not self.PATTERN_FILE.search(filename):
+                    continue
+                if os.path.exists(os.path.join(path, filename)):
+                    files[filename] = None
+                else:
+                    files.pop(filename, None)
+        return files
 
-        return True
+    def __read_blobs(self, path, shas):
+        "Streams the blobs through one git cat-file --batch process and stores them compressed"
+        if not shas:
+            return
+        self.msg.debug("  <PatternContentIndex> Reading blobs from " + os.path.basename(path), str(len(shas)))
+        try:
+            p = sp.Popen(['/usr/bin/git', 'cat-file', '--batch'], cwd=path, stdin=sp.PIPE, stdout=sp.PIPE, stderr=sp.DEVNULL)
+        except Exception as error:
+            self.msg.debug('  <PatternContentIndex> sp.Popen Exception', str(error))
+            return
+        rows = []
+        for sha in shas:
+            p.stdin.write(sha.encode() + b'\n')
+            p.stdin.flush()
+            header = p.stdout.readline().split()
+            if len(header) != 3:
+                # <sha> missing
+                continue
+            size = int(header[2])
+            content = p.stdout.read(size)
+            p.stdout.read(1)
+            rows.append((sha, zlib.compress(content)))
+        p.stdin.close()
+        p.wait()
+        with self.db:
+            self.db.executemany("INSERT OR REPLACE INTO blobs (sha, content) VALUES (?, ?)", rows)
+        self.blobs_read += len(rows)
+
+    def __cached(self, shas):
+        "Returns the blob ids already in the cache"
+        found = set()
+        shas = list(shas)
+        STEP = 500
+        for start in range(0, len(shas), STEP):
+            chunk = shas[start:start+STEP]
+            query = "SELECT sha FROM blobs WHERE sha IN ({})".format(','.join('?' * len(chunk)))
+            found.update(row[0] for row in self.db.execute(query, chunk))
+        return found
+
+    def refresh(self):
+        "Lists the pattern files of each repository and reads the blobs missing from the cache"
+        self.entries = {}
+        if not os.path.isdir(self.repo_dir):
+            return
+        for entry in sorted(os.scandir(self.repo_dir), key=lambda e: e.name):
+            if not entry.is_dir():
+                continue
+            if os.path.exists(os.path.join(entry.path, '.git')):
+                files = self.__list_blobs(entry.path)
+                shas = set(sha for sha in files.values() if sha)
+                self.__read_blobs(entry.path, sorted(shas - self.__cached(shas)))
+            elif self.ref:
+                continue
+            else:
+                files = {}
+                for root, dirs, names in os.walk(entry.path):
+                    for name in names:
+                        filename = os.path.relpath(os.path.join(root, name), entry.path)
+                        if self.PATTERN_FILE.search(filename):
+                            files[filename] = None
+            for filename, sha in files.items():
+                self.entries[self.repo_dir + entry.name + '/' + filename] = sha
+        self.__prune()
+        self.msg.debug("Pattern content index", str(self))
+
+    def __prune(self):
+        "Records the blob ids referenced by the ref and removes the blobs no ref references"
+        shas = set(sha for sha in self.entries.values() if sha)
+        with self.db:
+            self.db.execute("DELETE FROM refs WHERE ref = ?", (self.ref,))
+            self.db.executemany("INSERT INTO refs (ref, sha) VALUES (?, ?)", ((self.ref, sha) for sha in shas))
+            removed = self.db.execute("DELETE FROM blobs WHERE sha NOT IN (SELECT sha FROM refs)").rowcount
+        if removed > 0:
+            self.msg.debug("  <PatternContentIndex> Removed unreferenced blobs", str(removed))
+
+    def get_pattern_files(self):
+        "Returns the sorted absolute paths of the indexed pattern files"
+        return sorted(self.entries.keys())
+
+    def read(self, filename):
+        "Returns the content of an indexed pattern file, or an empty string if it cannot be read"
+        sha = self.entries.get(filename)
+        if sha:
+            row = self.db.execute("SELECT content FROM blobs WHERE sha = ?", (sha,)).fetchone()
+            if row is not None:
+                return zlib.decompress(row[0]).decode('utf-8', 'replace')
+            return ''
+        try:
+            with open(filename, "r", errors="replace") as f:
+                return f.read()
+        except OSError:
+            return ''
+
+    def search(self, check_pattern):
+        "Returns the indexed pattern files with a line matching the compiled check_pattern"
+        matches = []
+        for filename in self.get_pattern_files():
+            for line in self.read(filename).splitlines():
+                if check_pattern.search(line):
+                    matches.append(filename)
+                    break
+        return matches
 
-    def __get_committed_repo_range(self):
-        prog = "git --no-pager branch -a"
-        head_remote = ''
-        head_local = ''
-        repo_range = ''
-        head_name = re.compile("HEAD.*origin/")
+    def close(self):
+        self.db.close()
 
-        p = sp.run(prog, shell=True, check=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
+class LinkCache():
+    "Persistent link validation results with a time to live per status class and the redirects seen from old hosts"
+    CACHE_VERSION = 1
+    TTL_CLASSES = {'Confirmed': 'confirmed', 'Invalid URL': 'invalid', 'Invalid BUG': 'invalid', 'Old Host': 'invalid', 'Invalid Connection': 'failed', 'Server Timeout': 'failed', 'Unknown Error': 'failed'}
+    TTL_DEFAULTS = {'confirmed': '604800', 'invalid': '86400', 'failed': '3600'}
 
-        for l in p.stdout.splitlines():
-            line = l.lstrip()
-            if head_name.search(line):
-                head_remote = line.split()[-1]
+    def __init__(self, _msg, _config, _max_age = -1):
+        self.msg = _msg
+        self.max_age = _max_age
+        self.ttl = {}
+        for ttl_class, default in self.TTL_DEFAULTS.items():
+            try:
+                self.ttl[ttl_class] = int(config_option(_config, "Links", "cache_ttl_" + ttl_class, default))
+            except ValueError:
+                self.ttl[ttl_class] = int(default)
+        self.path = get_cache_dir(_config) + link_cache_filename
+        self.lock = threading.Lock()
+        self.links = {}
+        self.hops = {}
+        self.hits = 0
+        self.redirect_hits = 0
+        self.changed = False
+        self.__load()
 
-        head_local = head_remote.split("/")[-1]
-        repo_range = head_remote + ".." + head_local
+    def __str__(self):
+        return 'class %s(\n  path=%r\n  links=%r\n  hops=%r\n  ttl=%r\n  max_age=%r\n  hits=%r\n  redirect_hits=%r\n)' % (self.__class__.__name__, self.path, len(self.links), len(self.hops), self.ttl, self.max_age, self.hits, self.redirect_hits)
 
-        return repo_range
-        
-    def __get_committed_repo_uuid_list(self, _repo_range):
-        prog = "git --no-pager log " + _repo_range
-        commits_to_check = []
+    def __load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                cache = json.load(f)
+        except Exception as error:
+            self.msg.verbose("Ignoring invalid link cache", str(self.path) + ": " + str(error))
+            return
+        if( cache.get('version') != self.CACHE_VERSION ):
+            return
+        self.links = cache['links']
+        for link, entry in self.links.items():
+            self.__add_hops(link, entry)
+        self.msg.debug("  <LinkCache> Using cache", self.path)
+
+    def __add_hops(self, link, entry):
+        "Remembers every URL of a redirect chain that started on an old host"
+        if( entry['status'] == 'Old Host' ):
+            for hop in entry['redirects']:
+                self.hops[hop] = link
+
+    def __status_ttl(self, entry):
+        return self.ttl[self.TTL_CLASSES.get(entry['status'], 'failed')]
+
+    def __expired(self, entry, now):
+        if( self.max_age >= 0 ):
+            ttl = self.max_age
+        else:
+            ttl = self.__status_ttl(entry)
+        return ( now - entry['checked'] > ttl )
+
+    def get(self, link):
+        "Returns the cached result of the link, or None when it is missing or expired"
+        with self.lock:
+            entry = self.links.get(link)
+            if entry is None or self.__expired(entry, time.time()):
+                return None
+            self.hits += 1
+            return entry
+
+    def get_redirect(self, link):
+        "Returns the result of a known redirect chain from an old host that includes the link, or None when it is missing or expired"
+        if( self.max_age == 0 ):
+            return None
+        with self.lock:
+            entry = self.links.get(link)
+            if entry is None and link in self.hops:
+                entry = self.links.get(self.hops[link])
+            if entry is None or entry['status'] != 'Old Host' or len(entry['redirects']) == 0:
+                return None
+            if self.__expired(entry, time.time()):
+                return None
+            self.redirect_hits += 1
+            return entry
+
+    def add(self, link, result):
+        entry = {'status': result['status'], 'final_url': result['final_url'], 'redirects': result['redirects'], 'content': result['content'], 'checked': int(time.time())}
+        with self.lock:
+            self.links[link] = entry
+            self.__add_hops(link, entry)
+            self.changed = True
+
+    def save(self):
+        "Saves the results, dropping entries older than the longest time to live and redirect chains older than their own"
+        if not self.changed:
+            return
+        now = time.time()
+        oldest = now - max(self.ttl.values())
+        with self.lock:
+            links = {}
+            for link, entry in self.links.items():
+                if( len(entry['redirects']) > 0 ):
+                    if( now - entry['checked'] <= self.__status_ttl(entry) ):
+                        links[link] = entry
+                elif( entry['checked'] >= oldest ):
+                    links[link] = entry
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({'version': self.CACHE_VERSION, 'links': links}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+            self.changed = False
+        except Exception as error:
+            self.msg.verbose("Cannot save link cache", str(self.path) + ": " + str(error))
+
+class LinkValidator():
+    "Validates solution links on a pool of worker threads with pooled connections and a per host concurrency limit"
+    CONFIRMED = "Confirmed"
+    STATUS_COUNTERS = {'Invalid URL': 'badurl', 'Invalid Connection': 'badconnection', 'Server Timeout': 'ping', 'Unknown Error': 'ping', 'Old Host': 'oldhosts', 'Invalid BUG': 'bugid', 'Host Unreachable': 'unreachable'}
+    UNREACHABLE = "Host Unreachable"
+    CIRCUIT_FAILURES = ('Invalid Connection', 'Server Timeout')
+    # Only bugzilla and video pages are scanned for content, other links are checked with HEAD
+    CONTENT_LINKS = re.compile(r"show_bug\.cgi|youtube\.com|youtu\.be", re.IGNORECASE)
+    BAD_CONTENT = re.compile(rb"(?P<bug>Invalid Bug ID|You must enter a valid bug number)|(?P<video>This video isn't available anymore)", re.IGNORECASE)
+    BAD_CONTENT_OVERLAP = 64
+    HEAD_FALLBACK = (400, 403, 405, 501)
+    CHUNK_SIZE = 16384
+    # Bugzilla reports unknown ids in its XML with an error attribute on the bug element
+    BUG_ERRORS = ('NotFound', 'InvalidBugId')
+
+    def __init__(self, _msg, _config = None, _cache = None):
+        self.msg = _msg
+        self.cache = _cache
+        if _config is None:
+            _config = configparser.ConfigParser()
+        try:
+            self.workers = int(config_option(_config, "Links", "workers", '16'))
+            self.host_workers = int(config_option(_config, "Links", "host_workers", '4'))
+            self.timeout = float(config_option(_config, "Links", "timeout", '10'))
+            self.body_limit = int(config_option(_config, "Links", "body_limit", '1048576'))
+            self.circuit_failures = int(config_option(_config, "Links", "circuit_failures", '5'))
+            self.circuit_retry = int(config_option(_config, "Links", "circuit_retry", '60'))
+            self.bug_batch_size = int(config_option(_config, "Links", "bug_batch_size", '50'))
+        except ValueError:
+            self.workers = 16
+            self.host_workers = 4
+            self.timeout = 10
+            self.body_limit = 1048576
+            self.circuit_failures = 5
+            self.circuit_retry = 60
+            self.bug_batch_size = 50
+        self.bug_base_url = config_option(_config, "Common", "bug_base_url")
+        self.workers = max(self.workers, 1)
+        self.host_workers = max(self.host_workers, 1)
+        self.oldhosts = re.compile("novell.com|microfocus.com", re.IGNORECASE)
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.sessions = []
+        self.host_slots = {}
+        self.circuits = {}
+        self.events = []
+        self.pending = set()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.workers)
 
-        p = sp.run(prog, shell=True, check=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
+    def __str__(self):
+        return 'class %s(\n  workers=%r\n  host_workers=%r\n  timeout=%r\n  body_limit=%r\n  hosts=%r\n  bug_batch_size=%r\n  circuits=%r\n)' % (self.__class__.__name__, self.workers, self.host_workers, self.timeout, self.body_limit, len(self.host_slots), self.bug_batch_size, {host: circuit['state'] for host, circuit in self.circuits.items() if circuit['state'] != 'closed'})
+
+    def __get_session(self):
+        "Returns the session of the worker thread, its connections are kept alive per host"
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.host_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self.local.session = session
+            with self.lock:
+                self.sessions.append(session)
+        return session
+
+    def __host_slot(self, host):
+        with self.lock:
+            if host not in self.host_slots:
+                self.host_slots[host] = threading.BoundedSemaphore(self.host_workers)
+            return self.host_slots[host]
+
+    def __scan_body(self, x):
+        "Streams the body up to body_limit bytes, returns bug or video for the first invalid content found"
+        tail = b''
+        size = 0
+        for chunk in x.iter_content(chunk_size=self.CHUNK_SIZE):
+            data = tail + chunk
+            match = self.BAD_CONTENT.search(data)
+            if match:
+                return match.lastgroup
+            tail = data[-self.BAD_CONTENT_OVERLAP:]
+            size += len(chunk)
+            if( size >= self.body_limit ):
+                break
+        return ''
+
+    def __request(self, link, content_check):
+        session = self.__get_session()
+        if not content_check:
+            x = session.head(link, timeout=self.timeout, allow_redirects=True)
+            if x.status_code not in self.HEAD_FALLBACK:
+                return x
+            x.close()
+        return session.get(link, timeout=self.timeout, stream=True)
+
+    def __fetch(self, link, urlhost):
+        "Requests the link, returns its status, the final URL and redirects followed, and the content verdict"
+        result = {'status': self.CONFIRMED, 'final_url': link, 'redirects': [], 'content': ''}
+        content_check = ( self.CONTENT_LINKS.search(link) is not None )
+        x = None
+        with self.__host_slot(urlhost):
+            try:
+                x = self.__request(link, content_check)
+                result['final_url'] = x.url
+                result['redirects'] = [hop.url for hop in x.history]
+                x.raise_for_status()
+                if self.oldhosts.search(urlhost):
+                    result['status'] = "Old Host"
+                elif( content_check and x.status_code == 200 ):
+                    verdict = self.__scan_body(x)
+                    if( verdict == 'bug' ):
+                        result['status'] = "Invalid BUG"
+                        result['content'] = "invalid bug"
+                    elif( verdict == 'video' ):
+                        result['status'] = "Invalid URL"
+                        result['content'] = "video unavailable"
+                    else:
+                        result['content'] = "valid"
+            except requests.exceptions.HTTPError as errh:
+                result['status'] = "Invalid URL"
+            except requests.exceptions.ConnectionError as errc:
+                result['status'] = "Invalid Connection"
+            except requests.exceptions.Timeout as errt:
+                result['status'] = "Server Timeout"
+            except requests.exceptions.RequestException as err:
+                result['status'] = "Invalid URL"
+            except Exception as error:
+                result['status'] = "Unknown Error"
+            finally:
+                if x is not None:
+                    x.close()
+        return result
+
+    def __circuit_event(self, host, event):
+        self.events.append((host, event))
+        self.msg.debug("  <LinkValidator> Circuit " + event, host)
+
+    def __circuit_allows(self, host):
+        "Returns False while the circuit of the host is open, letting one half-open probe through after circuit_retry seconds"
+        with self.lock:
+            circuit = self.circuits.get(host)
+            if circuit is None or circuit['state'] == 'closed':
+                return True
+            if( circuit['state'] == 'open' and time.time() - circuit['opened'] >= self.circuit_retry ):
+                circuit['state'] = 'half-open'
+                self.__circuit_event(host, "Half-Open Probe")
+                return True
+            return False
 
-        for l in p.stdout.splitlines():
-            line = l.lstrip()
-            if( line.startswith("commit ") ):
-                commits_to_check.append(line.split()[1])
-        
-        return commits_to_check
+    def __circuit_record(self, host, status):
+        "Opens the circuit after circuit_failures consecutive connection failures or timeouts, a success closes it"
+        if( self.circuit_failures < 1 ):
+            return
+        with self.lock:
+            if host not in self.circuits:
+                self.circuits[host] = {'state': 'closed', 'failures': 0, 'opened': 0}
+            circuit = self.circuits[host]
+            if status in self.CIRCUIT_FAILURES:
+                circuit['failures'] += 1
+                if( circuit['state'] == 'half-open' ):
+                    circuit['state'] = 'open'
+                    circuit['opened'] = time.time()
+                    self.__circuit_event(host, "Reopened")
+                elif( circuit['state'] == 'closed' and circuit['failures'] >= self.circuit_failures ):
+                    circuit['state'] = 'open'
+                    circuit['opened'] = time.time()
+                    self.__circuit_event(host, "Opened")
+            else:
+                if( circuit['state'] != 'closed' ):
+                    self.__circuit_event(host, "Closed")
+                circuit['state'] = 'closed'
+                circuit['failures'] = 0
+
+    def check_link(self, link):
+        "Returns the status of one link, Confirmed or one of the STATUS_COUNTERS keys"
+        parts = link.split('/')
+        if( len(parts) > 2 ):
+            urlhost = parts[2]
+        else:
+            urlhost = ''
+        if self.cache is not None:
+            entry = self.cache.get(link)
+            if entry is None and self.oldhosts.search(urlhost):
+                entry = self.cache.get_redirect(link)
+            if entry is not None:
+                return entry['status']
+        if not self.__circuit_allows(urlhost):
+            return self.UNREACHABLE
+        result = self.__fetch(link, urlhost)
+        self.__circuit_record(urlhost, result['status'])
+        if self.cache is not None:
+            self.cache.add(link, result)
+        return result['status']
+
+    def __done(self, future):
+        with self.lock:
+            self.pending.discard(future)
+
+    def submit(self, link):
+        "Queues the link on the worker pool, returns the future of its status"
+        future = self.executor.submit(self.check_link, link)
+        with self.lock:
+            self.pending.add(future)
+        future.add_done_callback(self.__done)
+        return future
+
+    def __get_bug_id(self, link):
+        "Returns the bug number of a bug_base_url link, or an empty string for other links"
+        if( len(self.bug_base_url) > 0 and link.startswith(self.bug_base_url) ):
+            bug_id = link[len(self.bug_base_url):]
+            if bug_id.isdigit():
+                return bug_id
+        return ''
+
+    def __check_bug_batch(self, batch):
+        "Verifies the bugs of a batch with one show_bug.cgi XML request, returns the status of each link"
+        statuses = {}
+        bugs = {}
+        for link, bug_id in batch:
+            entry = None
+            if self.cache is not None:
+                entry = self.cache.get(link)
+            if entry is not None:
+                statuses[link] = entry['status']
+            else:
+                bugs[bug_id] = link
+        if( len(bugs) == 0 ):
+            return statuses
+        ids = sorted(bugs.keys(), key=int)
+        url = self.bug_base_url + "&id=".join(ids) + "&ctype=xml&field=bug_id"
+        urlhost = url.split('/')[2]
+        if not self.__circuit_allows(urlhost):
+            for link in bugs.values():
+                statuses[link] = self.UNREACHABLE
+            return statuses
+        self.msg.debug("  <LinkValidator> Bug batch", url)
+        status = self.CONFIRMED
+        found = {}
+        with self.__host_slot(urlhost):
+            try:
+                x = self.__get_session().get(url, timeout=self.timeout)
+                x.raise_for_status()
+                for bug in ET.fromstring(x.content).iter('bug'):
+                    bug_id = bug.findtext('bug_id', default='').strip()
+                    found[bug_id] = ( bug.get('error') not in self.BUG_ERRORS )
+            except requests.exceptions.ConnectionError as errc:
+                status = "Invalid Connection"
+            except requests.exceptions.Timeout as errt:
+                status = "Server Timeout"
+            except Exception as error:
+                self.msg.debug("  <LinkValidator> Bug batch failed, checking each link", str(error))
+        self.__circuit_record(urlhost, status)
+        for bug_id, link in bugs.items():
+            if( status != self.CONFIRMED ):
+                statuses[link] = status
+                continue
+            if bug_id not in found:
+                # The batch answer is unusable or incomplete, fall back to the bug page itself
+                statuses[link] = self.check_link(link)
+                continue
+            result = {'status': self.CONFIRMED, 'final_url': link, 'redirects': [], 'content': "valid"}
+            if not found[bug_id]:
+                result['status'] = "Invalid BUG"
+                result['content'] = "invalid bug"
+            if self.cache is not None:
+                self.cache.add(link, result)
+            statuses[link] = result['status']
+        return statuses
+
+    def __finish_bug_batch(self, job, futures):
+        for link, future in futures:
+            if job.cancelled():
+                future.cancel()
+            elif job.exception() is not None:
+                future.set_exception(job.exception())
+            else:
+                future.set_result(job.result()[link])
+
+    def submit_links(self, link_list):
+        "Queues the links on the worker pool, bugzilla links in batches of bug_batch_size, returns the futures in link order"
+        futures = []
+        batches = []
+        batch = []
+        for link in link_list:
+            bug_id = ''
+            if( self.bug_batch_size > 0 ):
+                bug_id = self.__get_bug_id(link)
+            if( len(bug_id) > 0 ):
+                future = concurrent.futures.Future()
+                batch.append((link, bug_id, future))
+                if( len(batch) >= self.bug_batch_size ):
+                    batches.append(batch)
+                    batch = []
+            else:
+                future = self.submit(link)
+            futures.append(future)
+        if( len(batch) > 0 ):
+            batches.append(batch)
+        for batch in batches:
+            job = self.executor.submit(self.__check_bug_batch, [(link, bug_id) for link, bug_id, future in batch])
+            with self.lock:
+                self.pending.add(job)
+            job.add_done_callback(self.__done)
+            job_futures = [(link, future) for link, bug_id, future in batch]
+            job.add_done_callback(lambda job, job_futures=job_futures: self.__finish_bug_batch(job, job_futures))
+        return futures
+
+    def cancel(self):
+        "Cancels the links that are still waiting for a worker"
+        with self.lock:
+            pending = list(self.pending)
+        for future in pending:
+            future.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        for session in self.sessions:
+            session.close()
+        if self.cache is not None:
+            self.cache.save()
+
+class SecurityPipeline():
+    """Streams the announcements of one month through pattern generation, validation and distribution over bounded queues
+
+    With _consolidate the announcements are collected into the consolidated driver of each
+    distribution instead, and the drivers are validated and distributed once all are read.
+    """
+    TERMINAL = ['Fatal', 'Duplicate', 'Distributed', 'Not_Distributed']
+    SAVE_INTERVAL = 5
+
+    def __init__(self, _msg, _config, _version, url_date, _consolidate = False):
+        self.msg = _msg
+        self.config = _config
+        self.version = _version
+        self.url_date = url_date
+        self.url_base = config_entry(_config.get("Security", "archive_url"))
+        self.target_url = self.url_base + url_date + "/"
+        self.pat_dir = config_entry(_config.get("Security", "pat_dir"), '/')
+        self.pat_logs_dir = config_entry(_config.get("Security", "pat_logs"), '/')
+        self.pat_error_dir = config_entry(_config.get("Security", "pat_error"), '/')
+        self.pat_dups_dir = config_entry(_config.get("Security", "pat_dups"), '/')
+        self.methods = config_option(_config, "Security", "distribute_methods", "reflink,copy").split(',')
+        try:
+            self.queue_size = int(config_option(_config, "Security", "pipeline_queue_size", '64'))
+        except ValueError:
+            self.queue_size = 64
+        self.manifest_file = self.pat_logs_dir + "manifest-sagen_" + url_date + ".cfg"
+        self.state_file = self.pat_logs_dir + sa_pipeline_prefix + url_date + ".cfg"
+        self.lock = threading.Lock()
+        self.last_save = 0
+        self.stats = {'announcements': 0, 'a_errors': 0, 'generated': 0, 'resumed': 0, 'valid': 0, 'fatal': 0, 'duplicates': 0, 'distributed': 0, 'd_errors': 0}
+        self.distributed = {}
+        self.staged = {}
+        self.consolidated = None
+        if _consolidate:
+            self.consolidated = ConsolidatedSecurityData(_msg, _config, _version, self.pat_dir)
+        self.manifest = configparser.ConfigParser()
+        self.manifest.optionxform = str # Ensures manifest keys are saved as case sensitive and not lowercase
+        if os.path.exists(self.manifest_file):
+            self.manifest.read(self.manifest_file)
+        self.state = configparser.ConfigParser()
+        self.state.optionxform = str
+        if os.path.exists(self.state_file):
+            self.state.read(self.state_file)
+        if not self.state.has_section('patterns'):
+            self.state['patterns'] = {}
+
+    def __str__(self):
+        return 'class %s(\n  url_date=%r\n  target_url=%r\n  state_file=%r\n  stats=%r\n)' % (self.__class__.__name__, self.url_date, self.target_url, self.state_file, self.stats)
+
+    def __initialize_manifest(self, total):
+        self.manifest['metadata'] = {}
+        self.manifest['metadata']['run_date'] = datetime.datetime.today().strftime("%c")
+        self.manifest['metadata']['pattern_count_total'] = str(total)
+        self.manifest['metadata']['pattern_count_current'] = str(0)
+        self.manifest['metadata']['percent_complete'] = str(0)
+        self.manifest['metadata']['patterns_evaluated'] = str(0)
+        self.manifest['metadata']['patterns_generated'] = str(0)
+        self.manifest['metadata']['patterns_duplicated'] = str(0)
+        self.manifest['metadata']['url_date'] = self.url_date
+        self.manifest['metadata']['url_base'] = self.url_base
+        self.manifest['metadata']['target_url'] = self.target_url
+        self.manifest['metadata']['pat_logs_dir'] = self.pat_logs_dir
+        self.manifest['metadata']['pat_dir'] = self.pat_dir
+
+    def __save(self, force = False):
+        "Writes the manifest and pipeline state, at most every SAVE_INTERVAL seconds unless forced"
+        with self.lock:
+            now = datetime.datetime.now().timestamp()
+            if not force and now - self.last_save < self.SAVE_INTERVAL:
+                return
+            self.last_save = now
+            with open(self.manifest_file, 'w') as configfile:
+                self.manifest.write(configfile)
+            with open(self.state_file, 'w') as configfile:
+                self.state.write(configfile)
+
+    def __set_state(self, pattern, status, stat_key = ''):
+        with self.lock:
+            self.state['patterns'][os.path.basename(pattern)] = status
+            if stat_key:
+                self.stats[stat_key] += 1
+        self.__save()
+
+    def __get_index(self):
+        try:
+            x = requests.get(self.target_url)
+        except Exception as error:
+            self.msg.min(' ERROR', "Cannot download " + str(self.target_url) + ": " + str(error))
+            return None
+        if( x.status_code != 200 ):
+            self.msg.min("ERROR " + str(x.status_code), "URL download failure - " + str(self.target_url))
+            return None
+        return get_archive_index_pairs(x.text.split('\n'))
+
+    def __generate(self, catalog, store, sa_id, sa_file):
+        "Downloads one announcement and creates its SLES patterns, returns the pattern paths"
+        sa_url = self.target_url + sa_file
+        self.msg.verbose("= Get Security URL", str(sa_id) + " (" + str(sa_file) + ")")
+        try:
+            url = requests.get(sa_url)
+        except Exception as error:
+            self.msg.normal(' ERROR', "Cannot download " + str(sa_url) + ": " + str(error))
+            self.manifest[sa_file]['status'] = 'Download_Error'
+            return None
+        if( url.status_code != 200 ):
+            self.msg.normal("ERROR " + str(url.status_code), "URL download failure - " + str(sa_url))
+            self.manifest[sa_file]['status'] = 'Download_Error'
+            return None
+        store.add(sa_file, url.content)
+        try:
+            security = SecurityAnnouncement(self.msg, self.config, self.target_url, sa_file, self.version)
+        except SystemExit:
+            self.manifest[sa_file]['status'] = 'Read_Error'
+            return None
+        create_list = security.get_list(sa_sles_distros)
+        if self.consolidated is not None:
+            self.consolidated.add_announcement(security, create_list, sa_sles_tag)
+        else:
+            security.create_patterns(create_list, sa_sles_tag)
+        catalog.add_announcement(security, self.url_date)
+        counters = security.get_stats()
+        patterns = security.get_patterns()
+        with self.lock:
+            for key, value in patterns.items():
+                self.manifest[sa_file][key] = str(value)
+                self.state['patterns'][key] = 'Pending'
+            # A consolidated announcement is complete once its driver data is saved
+            if self.consolidated is not None:
+                self.manifest[sa_file]['status'] = 'Consolidated'
+            else:
+                self.manifest[sa_file]['status'] = 'Complete'
+            metadata = self.manifest['metadata']
+            metadata['pattern_count_current'] = str(int(metadata['pattern_count_current']) + 1)
+            total = int(metadata['pattern_count_total'])
+            if( total > 0 ):
+                metadata['percent_complete'] = str(int(int(metadata['pattern_count_current'])*100/total))
+            for key in ['patterns_evaluated', 'patterns_generated', 'patterns_duplicated']:
+                metadata[key] = str(int(metadata[key]) + counters[key])
+            self.stats['a_errors'] += counters['a_errors']
+            self.stats['generated'] += len(patterns)
+        if self.consolidated is not None:
+            self.msg.normal("Consolidated", str(sa_id) + ", Distributions: " + str(len(create_list)))
+        else:
+            self.msg.normal("Generated", str(sa_id) + ", Patterns: " + str(len(patterns)))
+        return [self.pat_dir + key for key in patterns.keys()]
+
+    def __save_consolidated(self):
+        "Writes the consolidated data files and drivers, returns the drivers to validate"
+        files_written = self.consolidated.save()
+        drivers = []
+        with self.lock:
+            if not self.manifest.has_section('consolidated'):
+                self.manifest['consolidated'] = {}
+            for key, value in files_written.items():
+                self.manifest['consolidated'][key] = str(value)
+                if key.endswith('.py'):
+                    self.state['patterns'][key] = 'Pending'
+                    drivers.append(self.pat_dir + key)
+            for section in self.manifest.sections():
+                if self.manifest[section].get('status', '') == 'Consolidated':
+                    self.manifest[section]['status'] = 'Complete'
+            self.stats['generated'] += len(drivers)
+        self.__save(True)
+        return drivers
+
+    def __validate_worker(self, validator, pattern_index, validate_queue, distribute_queue):
+        while True:
+            pattern = validate_queue.get()
+            if pattern is None:
+                break
+            pattern_file = os.path.basename(pattern)
+            try:
+                if pattern_index.contains(pattern_file) and not is_consolidated_pattern(pattern_file):
+                    os.rename(pattern, self.pat_dups_dir + pattern_file)
+                    self.msg.normal("+ Duplicate", pattern_file)
+                    self.__set_state(pattern, 'Duplicate', 'duplicates')
+                    continue
+                result = validator.check_pattern(pattern)
+                if result['valid']:
+                    self.msg.normal("+ Valid", pattern_file)
+                    self.__set_state(pattern, 'Valid', 'valid')
+                    distribute_queue.put(pattern)
+                else:
+                    os.rename(pattern, self.pat_error_dir + pattern_file)
+                    self.msg.normal("+ Fatal", pattern_file)
+                    for error in result['errors']:
+                        self.msg.verbose("  + " + error)
+                    self.__set_state(pattern, 'Fatal', 'fatal')
+            except Exception as error:
+                self.msg.normal("+ Error: Cannot validate {0}: {1}".format(pattern_file, error))
+
+    def __distribute_worker(self, distribute_queue):
+        while True:
+            pattern = distribute_queue.get()
+            if pattern is None:
+                break
+            status = 'Not_Distributed'
+            for distro, entries in plan_sa_distribution(self.config, [pattern]).items():
+                for entry in entries:
+                    if entry['action'] not in ('copy', 'update'):
+                        self.msg.normal("+ Not distributed, {0}".format(entry['action']), entry['target'])
+                        continue
+                    try:
+                        copy_pattern_file(entry['pattern'], entry['target'], self.methods, entry['action'] == 'update')
+                    except OSError as error:
+                        self.msg.normal("+ Error: {0}".format(error))
+                        continue
+                    status = 'Distributed'
+                    self.msg.normal("+ Distributed", entry['target'])
+                    with self.lock:
+                        self.distributed.setdefault(distro, []).append(entry['target'])
+                        self.staged.setdefault(entry['repo'], []).append(entry['target'])
+            self.__set_state(pattern, status, 'distributed' if status == 'Distributed' else 'd_errors')
+
+    def __resume_list(self):
+        "Returns the generated patterns that have not finished validation and distribution"
+        resume = []
+        for section in self.manifest.sections():
+            if section == 'consolidated':
+                keys = [key for key in self.manifest[section].keys() if key.endswith('.py')]
+            elif section == "metadata" or self.manifest[section].get('status', '') != 'Complete':
+                continue
+            else:
+                keys = [key for key in self.manifest[section].keys() if key != 'status']
+            for key in keys:
+                if self.state['patterns'].get(key, 'Pending') in self.TERMINAL:
+                    continue
+                if os.path.exists(self.pat_dir + key):
+                    resume.append(self.pat_dir + key)
+        return resume
+
+    def run(self):
+        "Runs the pipeline, returns the statistics or None when it cannot start"
+        said_file_pairs = self.__get_index()
+        if said_file_pairs is None:
+            return None
+        if not self.manifest.has_section('metadata'):
+            self.__initialize_manifest(len(said_file_pairs))
+        self.manifest['metadata']['pattern_count_total'] = str(len(said_file_pairs))
+        pending = []
+        for sa_id, sa_file in said_file_pairs.items():
+            if not self.manifest.has_section(sa_file):
+                self.manifest[sa_file] = {'status': 'Assigned'}
+            if( self.manifest[sa_file]['status'] != 'Complete' ):
+                pending.append((sa_id, sa_file))
+        resume = self.__resume_list()
+        self.stats['resumed'] = len(resume)
+        self.msg.min("Announcement Source", self.url_date)
+        self.msg.min("Announcements to Process", str(len(pending)))
+        self.msg.min("Patterns to Resume", str(len(resume)))
+
+        validator = PatternValidator(self.msg, self.config)
+        if( len(validator.get_archives()) == 0 ):
+            self.msg.min("Error: No supportconfig archives found in {}\n".format(validator.arch_dir))
+            return None
+        pattern_index = PatternIndex(self.msg, self.config)
+        validate_queue = queue.Queue(maxsize=self.queue_size)
+        distribute_queue = queue.Queue(maxsize=self.queue_size)
+        validators = [threading.Thread(target=self.__validate_worker, args=(validator, pattern_index, validate_queue, distribute_queue)) for i in range(validator.workers)]
+        distributor = threading.Thread(target=self.__distribute_worker, args=(distribute_queue,))
+        for thread in validators + [distributor]:
+            thread.start()
+
+        try:
+            for pattern in resume:
+                validate_queue.put(pattern)
+            catalog = SecurityCatalog(self.msg, self.config)
+            store = AnnouncementStore(self.msg, self.pat_logs_dir, self.url_date)
+            for sa_id, sa_file in pending:
+                patterns = self.__generate(catalog, store, sa_id, sa_file)
+                self.stats['announcements'] += 1
+                if patterns is None:
+                    self.stats['a_errors'] += 1
+                    continue
+                for pattern in patterns:
+                    validate_queue.put(pattern)
+            catalog.close()
+            if self.consolidated is not None:
+                for pattern in self.__save_consolidated():
+                    validate_queue.put(pattern)
+        finally:
+            for thread in validators:
+                validate_queue.put(None)
+            for thread in validators:
+                thread.join()
+            distribute_queue.put(None)
+            distributor.join()
+            self.__finish()
+        return self.stats
+
+    def __finish(self):
+        "Records the distributed patterns in the distribution log, stages them and saves the pipeline state"
+        if self.distributed:
+            log = load_distribution_log(self.config, self.stats['distributed'])
+            for distro, targets in self.distributed.items():
+                for target in targets:
+                    log[distro][target] = 'Distributed'
+                count = len([key for key, value in log.items(distro) if value == 'Distributed'])
+                log[distro]['Count'] = str(count)
+            with open(self.pat_logs_dir + sa_distribution_log_filename, 'w') as logfile:
+                log.write(logfile)
+        for repo, files in self.staged.items():
+            stage_repo_files(self.msg, repo, sorted(files))
+        self.__save(force = True)
+
+class GitHubRepository():
+    """Creates an instance of a GitHub repository. _path must be a valid GitHub repository
+
+    The repository state is read from the git directory, or from one porcelain status
+    and one for-each-ref call when that is ambiguous. The status content, branches,
+    show_branch, log and diff entries of the info dictionary, as well as the local
+    pattern lists, are only gathered when requested with their get_* methods. With
+    _config the state and pattern lists are cached until the git directory or the
+    working tree changes.
+    """
+    STATE_VERSION = 2
+    # Gathered on request and not cached, the status content is small enough to keep
+    LAZY_KEYS = ('branches', 'show_branch', 'log', 'diff')
+
+    def __init__(self, _msg, _path, _config = None):
+        self.msg = _msg
+        self.path = _path
+        self.info = {'name': os.path.basename(self.path), 'valid': True, 'origin': '', 'origin_id': '', 'branch': '', 'branch_commit': '', 'remote_branch': '', 'remote_branch_commit': '', 'outdated': True, 'state': '', 'content': None, 'branches': None, 'show_branch': None, 'log': None, 'diff': None, 'spec_ver': 'Unknown', 'spec_ver_bumped': 'Unknown'}
+        self.git_config_file = self.path + "/.git/config"
+        self.spec_file = self.path + '/spec/' + self.info['name'] + ".spec"
+        self.head_oid = ''
+        self.upstream = ''
+        self.status_entries = None
+        self.refs = {}
+        self.uncommitted_patterns = {}
+        self.committed_patterns = {}
+        self.local_sa_patterns = None
+        self.local_regular_patterns = None
+        self.state_path = ''
+        self.state_key = None
+        self.tree_dirs = None
+        if _config is not None:
+            self.state_path = get_cache_dir(_config) + repo_state_prefix + "{}-{:08x}.json".format(self.info['name'], zlib.crc32(os.path.abspath(self.path).encode()))
+        if not self.__load_state():
+            if self.__probe_repo_info():
+                self.__save_state()
+
+    def __scan_tree(self):
+        """Returns the working tree directories with their mtime, subdirectories and files
+
+        A directory is only listed again when its mtime changed since the cached scan, the
+        entries of an unchanged directory are taken from the cache.
+        """
+        previous = self.tree_dirs or {}
+        racy = int(time.time() * 1000000000) - 2000000000
+        dirs = {}
+        pending = ['']
+        while pending:
+            rel_dir = pending.pop()
+            path = os.path.join(self.path, rel_dir)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                continue
+            cached = previous.get(rel_dir)
+            if cached is not None and cached[0] == mtime:
+                (subdirs, files) = (cached[1], cached[2])
+            else:
+                subdirs = []
+                files = []
+                try:
+                    with os.scandir(path) as entries:
+                        for entry in entries:
+                            if entry.name == '.git' and not rel_dir:
+                                continue
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.name)
+                            else:
+                                files.append(entry.name)
+                except OSError:
+                    continue
+            # A directory changed within the timestamp granularity is listed again next time
+            dirs[rel_dir] = [mtime if mtime < racy else 0, subdirs, files]
+            for name in subdirs:
+                pending.append(rel_dir + '/' + name if rel_dir else name)
+        return dirs
+
+    def __get_state_key(self):
+        """Returns the mtimes of the git directory files that hold the repository state and a
+        count and latest mtime of the working tree entries"""
+        git_dir = os.path.join(self.path, '.git')
+        mtimes = {}
+        for name in ('index', 'HEAD', 'packed-refs', 'config'):
+            try:
+                mtimes[name] = os.stat(os.path.join(git_dir, name)).st_mtime_ns
+            except OSError:
+                mtimes[name] = 0
+        try:
+            mtimes['spec'] = os.stat(self.spec_file).st_mtime_ns
+        except OSError:
+            mtimes['spec'] = 0
+        for base in ('refs/heads', 'refs/remotes'):
+            for root, dirs, files in os.walk(os.path.join(git_dir, base)):
+                for name in dirs + files + ['']:
+                    path = os.path.join(root, name)
+                    try:
+                        mtimes[os.path.relpath(path, git_dir)] = os.stat(path).st_mtime_ns
+                    except OSError:
+                        pass
+        self.tree_dirs = self.__scan_tree()
+        count = 0
+        latest = 0
+        for rel_dir, (mtime, subdirs, files) in self.tree_dirs.items():
+            count += len(subdirs) + len(files)
+            for name in subdirs + files:
+                try:
+                    st = os.lstat(os.path.join(self.path, rel_dir, name))
+                except OSError:
+                    continue
+                latest = max(latest, st.st_mtime_ns, st.st_ctime_ns)
+        try:
+            latest = max(latest, os.stat(self.path).st_mtime_ns)
+        except OSError:
+            pass
+        return {'git': mtimes, 'tree': [count, latest]}
+
+    def __load_state(self):
+        "Uses the cached repository state when nothing changed in the git directory or working tree"
+        if not self.state_path or not os.path.exists(self.git_config_file):
+            return False
+        cache = {}
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r") as f:
+                    cache = json.load(f)
+            except Exception as error:
+                self.msg.verbose("Ignoring invalid repository state", str(self.state_path) + ": " + str(error))
+                cache = {}
+        if( cache.get('version') == self.STATE_VERSION and cache.get('path') == self.path ):
+            self.tree_dirs = cache['tree_dirs']
+        self.state_key = self.__get_state_key()
+        if not cache:
+            return False
+        if( cache.get('version') != self.STATE_VERSION or cache.get('path') != self.path or cache.get('key') != self.state_key ):
+            self.msg.debug("  <GitHubRepository> Changed", self.path)
+            return False
+        self.msg.normal("Probing repository", self.info['name'])
+        self.msg.debug("  <GitHubRepository> Using cache", self.state_path)
+        self.info.update(cache['info'])
+        self.head_oid = cache['head_oid']
+        self.upstream = cache['upstream']
+        self.refs = cache['refs']
+        if cache['status_entries'] is not None:
+            self.status_entries = [tuple(entry) for entry in cache['status_entries']]
+        self.local_sa_patterns = cache['local_sa_patterns']
+        self.local_regular_patterns = cache['local_regular_patterns']
+        return True
+
+    def __save_state(self):
+        if not self.state_path or self.state_key is None:
+            return
+        info = dict(self.info)
+        for key in self.LAZY_KEYS:
+            info[key] = None
+        state = {'version': self.STATE_VERSION, 'path': self.path, 'key': self.state_key, 'info': info, 'head_oid': self.head_oid, 'upstream': self.upstream, 'refs': self.refs, 'status_entries': self.status_entries, 'local_sa_patterns': self.local_sa_patterns, 'local_regular_patterns': self.local_regular_patterns, 'tree_dirs': self.tree_dirs}
+        tmp_path = self.state_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(state, f, separators=(',', ':'))
+            os.replace(tmp_path, self.state_path)
+        except Exception as error:
+            self.msg.verbose("Cannot save repository state", str(self.state_path) + ": " + str(error))
+
+    def __str__ (self):
+        pattern = '''
+Class instance of {}
+  name = {}
+  branch = {}
+  branch_commit = {}
+  remote_branch = {}
+  remote_branch_commit = {}
+  valid = {}
+  outdated = {}
+  state = {}
+  spec_ver = {}
+  spec_ver_bumped = {}
+  content = {}\n
+  branches = {}\n
+  show_branch = {}\n
+  log = {}\n
+  diff = {}\n
+'''
+        return pattern.format(self.__class__.__name__, self.info['name'], self.info['branch'], self.info['branch_commit'], self.info['remote_branch'], self.info['remote_branch_commit'], self.info['valid'], self.info['outdated'], self.info['state'], self.info['spec_ver'], self.info['spec_ver_bumped'], self.info['content'], self.info['branches'], self.info['show_branch'], self.info['log'], self.info['diff'])
+
+    def __run_git(self, _label, _args):
+        """Returns the completed git process run in the repository, or None if git could not be run"""
+        prog = ['/usr/bin/git', '--no-pager'] + _args
+        try:
+            p = sp.run(prog, cwd=self.path, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+        except Exception as e:
+            self.msg.debug('  <{}> sp.run Exception: {}'.format(_label, ' '.join(prog)))
+
+            self.msg.normal()
+            self.msg.normal(str(e))
+            self.msg.normal()
+            self.msg.normal('-' * SEPARATOR_LEN)
+            self.msg.normal()
+            return None
+
+        if p.returncode > 0:
+            self.msg.debug("  <{}> Non-Zero return code, p.returncode > 0".format(_label))
+            return None
+        self.msg.debug("<> Command Output", ' '.join(prog))
+        return p
+
+    def __get_lines(self, _key, _label, _args):
+        if self.info[_key] is None:
+            self.info[_key] = []
+            if self.info['state'] not in ("Missing", "Not Git"):
+                p = self.__run_git(_label, _args)
+                if p is not None:
+                    self.info[_key] = p.stdout.splitlines()
+                    for line in self.info[_key]:
+                        self.msg.debug("> " + line)
+        return self.info[_key]
+
+    def __parse_status(self, _output):
+        """Parses git status --porcelain=v2 --branch -z output into branch headers and entries"""
+        headers = {}
+        self.status_entries = []
+        fields = _output.split('\0')
+        i = 0
+        while i < len(fields):
+            field = fields[i]
+            i += 1
+            if not field:
+                continue
+            self.msg.debug("> " + field)
+            if field.startswith('# '):
+                parts = field[2:].split(' ', 1)
+                if len(parts) > 1:
+                    headers[parts[0]] = parts[1]
+            elif field.startswith('1 '):
+                parts = field.split(' ', 8)
+                self.status_entries.append((parts[1], parts[-1], ''))
+            elif field.startswith('2 '):
+                parts = field.split(' ', 9)
+                self.status_entries.append((parts[1], parts[-1], fields[i]))
+                i += 1
+            elif field.startswith('u '):
+                parts = field.split(' ', 10)
+                self.status_entries.append(('UU', parts[-1], ''))
+            elif field.startswith('? '):
+                self.status_entries.append(('??', field[2:], ''))
+        return headers
+
+    def __evaluate_state(self, _clean):
+        self.msg.verbose("Evaluating repository state")
+        if _clean:
+            if self.info['remote_branch']:
+                if self.info['branch_commit'] == self.info['remote_branch_commit']:
+                    self.msg.debug("> Nothing to commit, branch_commit matches remote_branch_commit")
+                    self.info['outdated'] = False
+                    self.info['state'] = "Current"
+                else:
+                    self.msg.debug("> Nothing to commit, branch_commit does NOT match remote_branch_commit")
+                    self.info['outdated'] = True
+                    self.info['state'] = "Push"
+            else:
+                self.info['outdated'] = False
+                self.info['state'] = "Current"
+                commit_count = 0
+                for ref, oid in self.refs.items():
+                    if ref.startswith('refs/heads/') and oid == self.head_oid:
+                        commit_count += 1
+                if commit_count < 2:
+                    self.info['outdated'] = False
+                    self.info['state'] = "Merge"
+        if not self.info['state']:
+            self.msg.debug("> Commit needed")
+            self.info['outdated'] = True
+            self.info['state'] = "Commit"
+
+    def __set_branch_refs(self):
+        if self.info['branch']:
+            self.info['branch_commit'] = self.refs.get('refs/heads/' + self.info['branch'], '')
+            remote_ref = 'refs/remotes/origin/' + self.info['branch']
+            if remote_ref in self.refs:
+                self.info['remote_branch'] = "remotes/origin/" + self.info['branch']
+                self.info['remote_branch_commit'] = self.refs[remote_ref]
+        if not self.upstream:
+            if self.info['remote_branch']:
+                self.upstream = 'origin/' + self.info['branch']
+            elif 'refs/remotes/origin/HEAD' in self.refs:
+                self.upstream = 'origin/HEAD'
+
+    def __read_refs(self):
+        """Reads the branch and remote branch refs from packed-refs and the loose ref files"""
+        git_dir = os.path.join(self.path, '.git')
+        refs = {}
+        try:
+            with open(os.path.join(git_dir, 'packed-refs'), 'r') as fd:
+                for line in fd:
+                    parts = line.split()
+                    if len(parts) == 2 and not line.startswith('#') and parts[1].startswith(('refs/heads/', 'refs/remotes/')):
+                        refs[parts[1]] = parts[0]
+        except FileNotFoundError:
+            pass
+        symbolic = {}
+        for base in ('refs/heads', 'refs/remotes'):
+            for root, dirs, files in os.walk(os.path.join(git_dir, base)):
+                for name in files:
+                    path = os.path.join(root, name)
+                    ref = os.path.relpath(path, git_dir).replace(os.sep, '/')
+                    try:
+                        with open(path, 'r') as fd:
+                            value = fd.read().strip()
+                    except OSError:
+                        return None
+                    if value.startswith('ref: '):
+                        symbolic[ref] = value[5:]
+                    else:
+                        refs[ref] = value
+        for ref, target in symbolic.items():
+            if target in refs:
+                refs[ref] = refs[target]
+        for oid in refs.values():
+            if len(oid) != 40:
+                return None
+        return refs
+
+    def __get_object_dirs(self):
+        """Returns the repository object directory followed by its alternates"""
+        objects_dir = os.path.join(self.path, '.git', 'objects')
+        object_dirs = [objects_dir]
+        try:
+            with open(os.path.join(objects_dir, 'info', 'alternates'), 'r') as fd:
+                for line in fd:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        object_dirs.append(os.path.join(objects_dir, line))
+        except OSError:
+            pass
+        return object_dirs
+
+    def __read_packed_commit(self, _objects_dir, _oid):
+        """Returns the start of a commit stored whole in a pack of _objects_dir, or None if it is
+        not found there. Deltified commits return empty bytes and are left for git."""
+        pack_dir = os.path.join(_objects_dir, 'pack')
+        try:
+            idx_files = [name for name in os.listdir(pack_dir) if name.endswith('.idx')]
+        except OSError:
+            return None
+        oid = bytes.fromhex(_oid)
+        for idx_name in idx_files:
+            try:
+                with open(os.path.join(pack_dir, idx_name), 'rb') as fd:
+                    header = fd.read(8 + 256 * 4)
+                    if len(header) < 8 + 256 * 4 or header[:8] != b'\377tOc\0\0\0\2':
+                        continue
+                    fanout = struct.unpack('>256L', header[8:])
+                    total = fanout[255]
+                    low = fanout[oid[0] - 1] if oid[0] else 0
+                    high = fanout[oid[0]]
+                    position = -1
+                    while low < high:
+                        middle = (low + high) // 2
+                        fd.seek(8 + 256 * 4 + middle * 20)
+                        entry = fd.read(20)
+                        if entry == oid:
+                            position = middle
+                            break
+                        elif entry < oid:
+                            low = middle + 1
+                        else:
+                            high = middle
+                    if position < 0:
+                        continue
+                    offset_table = 8 + 256 * 4 + total * 24
+                    fd.seek(offset_table + position * 4)
+                    offset = struct.unpack('>L', fd.read(4))[0]
+                    if offset & 0x80000000:
+                        fd.seek(offset_table + total * 4 + (offset & 0x7fffffff) * 8)
+                        offset = struct.unpack('>Q', fd.read(8))[0]
+                with open(os.path.join(pack_dir, idx_name[:-4] + '.pack'), 'rb') as fd:
+                    fd.seek(offset)
+                    data = fd.read(4096)
+            except (OSError, struct.error):
+                return b''
+            if not data:
+                return b''
+            object_type = (data[0] >> 4) & 7
+            i = 0
+            while i < len(data) - 1 and data[i] & 0x80:
+                i += 1
+            if object_type != 1:
+                return b''
+            try:
+                return zlib.decompressobj().decompress(data[i+1:], 256)
+            except zlib.error:
+                return b''
+        return None
+
+    def __read_commit_tree(self, _oid):
+        """Returns the tree of the commit from a loose object or a pack, or an empty string if
+        it cannot be read without git"""
+        for objects_dir in self.__get_object_dirs():
+            try:
+                with open(os.path.join(objects_dir, _oid[:2], _oid[2:]), 'rb') as fd:
+                    data = zlib.decompressobj().decompress(fd.read(), 256)
+            except FileNotFoundError:
+                data = self.__read_packed_commit(objects_dir, _oid)
+                if data is None:
+                    continue
+            except (OSError, zlib.error):
+                return ''
+            if data.startswith(b'commit '):
+                data = data.partition(b'\0')[2]
+            if not data.startswith(b'tree '):
+                return ''
+            return data[5:45].decode('ascii', 'replace')
+        return ''
+
+    def __read_worktree_state(self):
+        """Returns clean or dirty when the index and working tree answer it, otherwise an empty string
+
+        Index entries are compared with lstat like git does. Anything git would have to
+        hash or match against ignore rules, like a changed mtime, a racily clean entry or
+        a file missing from the index, is left for git status.
+        """
+        ENTRY_SIZE = 62
+        index_file = os.path.join(self.path, '.git', 'index')
+        try:
+            index_stat = os.stat(index_file)
+            with open(index_file, 'rb') as fd:
+                data = fd.read()
+        except OSError:
+            return ''
+        if len(data) < 32 or data[:4] != b'DIRC':
+            return ''
+        (version, count) = struct.unpack('>LL', data[4:12])
+        if version not in (2, 3):
+            return ''
+        index_mtime = (index_stat.st_mtime_ns // 1000000000, index_stat.st_mtime_ns % 1000000000)
+        tracked = set()
+        dirty = False
+        offset = 12
+        for i in range(count):
+            (ctime_s, ctime_ns, mtime_s, mtime_ns, dev, ino, mode, uid, gid, size) = struct.unpack('>10L', data[offset:offset+40])
+            flags = struct.unpack('>H', data[offset+60:offset+62])[0]
+            fixed = ENTRY_SIZE
+            ext_flags = 0
+            if flags & 0x4000:
+                ext_flags = struct.unpack('>H', data[offset+62:offset+64])[0]
+                fixed += 2
+            name_end = data.index(b'\0', offset + fixed)
+            name = data[offset+fixed:name_end].decode('utf-8', 'surrogateescape')
+            offset += (fixed + len(name.encode('utf-8', 'surrogateescape')) + 8) // 8 * 8
+            if (flags >> 12) & 3 or ext_flags & 0x2000 or mode & 0o170000 == 0o160000:
+                return ''
+            tracked.add(name)
+            if ext_flags & 0x4000:
+                continue
+            try:
+                st = os.lstat(os.path.join(self.path, name))
+            except FileNotFoundError:
+                dirty = True
+                continue
+            except OSError:
+                return ''
+            if st.st_size != size:
+                dirty = True
+            elif (st.st_mtime_ns // 1000000000, st.st_mtime_ns % 1000000000) != (mtime_s, mtime_ns) or (st.st_mode & 0o100) != (mode & 0o100):
+                return ''
+            elif (mtime_s, mtime_ns) >= index_mtime:
+                return ''
+        if dirty:
+            return 'dirty'
+
+        # Staged changes, the cached root tree must match the HEAD commit tree
+        root_tree = ''
+        while offset + 8 <= len(data) - 20:
+            signature = data[offset:offset+4]
+            size = struct.unpack('>L', data[offset+4:offset+8])[0]
+            if signature == b'TREE':
+                fields = data[offset+8:offset+8+size].split(b'\n', 1)
+                (path, sep, counts) = fields[0].partition(b'\0')
+                if path == b'' and not counts.startswith(b'-') and len(fields) > 1:
+                    root_tree = fields[1][:20].hex()
+            elif signature[:1] < b'A' or signature[:1] > b'Z':
+                return ''
+            offset += 8 + size
+        if not root_tree or root_tree != self.__read_commit_tree(self.head_oid):
+            return ''
+
+        # Untracked files from the working tree scan, git status decides if they are ignored
+        if self.tree_dirs is None:
+            self.tree_dirs = self.__scan_tree()
+        for rel_dir, (mtime, subdirs, files) in self.tree_dirs.items():
+            for name in files:
+                if (rel_dir + '/' + name if rel_dir else name).replace(os.sep, '/') not in tracked:
+                    return ''
+        return 'clean'
+
+    def __read_git_dir(self):
+        """Determines the repository state from the git directory without running git"""
+        try:
+            with open(os.path.join(self.path, '.git', 'HEAD'), 'r') as fd:
+                head = fd.read().strip()
+        except OSError:
+            return False
+        if not head.startswith('ref: refs/heads/'):
+            return False
+        refs = self.__read_refs()
+        if refs is None or head[5:] not in refs:
+            return False
+        self.refs = refs
+        self.info['branch'] = head[16:]
+        self.head_oid = refs[head[5:]]
+        state = self.__read_worktree_state()
+        if not state:
+            self.msg.debug("  <probe> Working tree state is ambiguous, using git")
+            return False
+        self.__set_branch_refs()
+        if state == 'clean':
+            self.status_entries = []
+        self.__evaluate_state(state == 'clean')
+        return True
+
+    def __probe_git(self):
+        p = self.__run_git('status', ['status', '--porcelain=v2', '--branch', '-z', '--untracked-files=all'])
+        if p is None:
+            return False
+        headers = self.__parse_status(p.stdout)
+        if headers.get('branch.head', '(detached)') != '(detached)':
+            self.info['branch'] = headers['branch.head']
+        if headers.get('branch.oid', '(initial)') != '(initial)':
+            self.head_oid = headers['branch.oid']
+        if 'branch.upstream' in headers:
+            self.upstream = headers['branch.upstream']
+
+        # Branch and remote branch commits
+        self.refs = {}
+        p = self.__run_git('for-each-ref', ['for-each-ref', '--format=%(refname)%00%(objectname)', 'refs/heads', 'refs/remotes'])
+        if p is not None:
+            for line in p.stdout.splitlines():
+                parts = line.split('\0')
+                self.msg.debug("> " + ' '.join(parts))
+                if len(parts) == 2:
+                    self.refs[parts[0]] = parts[1]
+        self.__set_branch_refs()
+        self.__evaluate_state(len(self.status_entries) == 0)
+        return True
+
+    def __probe_repo_info(self):
+        self.msg.normal("Probing repository", self.info['name'])
+        IDX_ID = 3
+        # Remote origin
+        if not os.path.exists(self.path):
+            self.info['valid'] = False
+            self.info['state'] = "Missing"
+            return False
+        elif not os.path.exists(self.git_config_file):
+            self.info['valid'] = False
+            self.info['state'] = "Not Git"
+            return False
+        git_config = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
+        git_config.read(self.git_config_file)
+        if git_config.has_option('remote "origin"', "url"):
+            self.info['origin'] = config_entry(git_config.get('remote "origin"', "url"))
+            origin_parts = self.info['origin'].split('/')
+            if len(origin_parts) > IDX_ID:
+                self.info['origin_id'] = origin_parts[IDX_ID]
+        del git_config
+        self.msg.verbose("+ Remote Origin", self.info['origin'])
+        self.msg.verbose("+ Remote Origin ID", self.info['origin_id'])
+
+        if os.path.exists(self.spec_file):
+            # Spec file version
+            this_version = ""
+            version = re.compile("^Version:\s.*[0-9]", re.IGNORECASE)
+            fd = open(self.spec_file, "r")
+            lines = fd.readlines()
+            fd.close()
+            for line in lines:
+                if version.search(line):
+                    this_version = line.split()[-1]
+                    break
+
+            self.info['spec_ver'] = this_version
+
+            if( this_version ):
+                parts = this_version.split('.')
+                bumped = str(int(parts[-1]) + 1)
+                parts[-1] = str(bumped)
+                bumped_version = '.'.join(parts)
+                self.info['spec_ver_bumped'] = bumped_version
+                self.msg.verbose("+ Bumping package version", "{0} -> {1}".format(self.info['spec_ver'], self.info['spec_ver_bumped']))
+            else:
+                self.msg.verbose("+ Could not find package version in {0}".format(self.spec_file))
+
+        # Branch and working tree state, git is only run when the git directory cannot answer
+        if not self.__read_git_dir():
+            self.info['branch'] = ''
+            self.head_oid = ''
+            if not self.__probe_git():
+                self.info['valid'] = False
+                return False
+
+        if( len(self.info['origin']) == 0 ):
+            self.info['valid'] = False
+        if( len(self.info['branch']) == 0 ):
+            self.info['valid'] = False
+        if( len(self.head_oid) == 0 ):
+            self.info['valid'] = False
+
+        return True
 
     def get_info(self):
         return self.info
 
+    def get_content(self):
+        if self.info['content'] is None:
+            self.__get_lines('content', 'status', ['status'])
+            self.__save_state()
+        return self.info['content']
+
+    def get_branches(self):
+        return self.__get_lines('branches', 'branch', ['branch', '-a'])
+
+    def get_show_branch(self):
+        if self.info['show_branch'] is None:
+            data = self.__get_lines('show_branch', 'show-branch all', ['show-branch'])
+            self.info['show_branch'] = []
+            for line in data:
+                if line.startswith('-'):
+                    break
+                else:
+                    self.info['show_branch'].append(line)
+        return self.info['show_branch']
+
+    def get_log(self):
+        return self.__get_lines('log', 'log', ['log'])
+
+    def get_diff(self):
+        return self.__get_lines('diff', 'diff', ['diff'])
+
     def get_uncommitted_list(self):
         self.msg.normal("Searching for local patterns", "Uncommitted")
-        prog = "git status"
         self.uncommitted_patterns = {}
         pat_file = re.compile("^patterns/.*")
-        new_file = re.compile("^new file:.*patterns/", re.IGNORECASE)
-        mod_file = re.compile("^modified:.*patterns/", re.IGNORECASE)
-        del_file = re.compile("^deleted:.*patterns/", re.IGNORECASE)
-        oldwd = os.getcwd()
-        os.chdir(self.path)
-
-        p = sp.run(prog.split(), check=False, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
-        if p.returncode != 0:
-            print(p.stderr)
-            sys.exit(p.returncode)
-        # There are two possible output formats from this command:
-        #     new file:   patterns/SLE/sle15sp4/xterm_SUSE-SU-2023_0221-1_sles_15.4.py
-        #   patterns/SLE/sle15sp4/xterm_SUSE-SU-2023_0221-1_sles_15.4.py
-        # This currently handles both formats
-        os.chdir(oldwd)
-
-        this_pattern = ''
-        for l in p.stdout.splitlines():
-            line = l.lstrip()
-            if pat_file.search(line):
-                pattern_path = line
-                self.uncommitted_patterns[pattern_path] = 'add'
-            elif new_file.search(line):
-                pattern_path = line.split()[-1]
-                self.uncommitted_patterns[pattern_path] = 'add'
-            elif mod_file.search(line):
-                pattern_path = line.split()[-1]
-                self.uncommitted_patterns[pattern_path] = 'mod'
-            elif del_file.search(line):
-                pattern_path = line.split()[-1]
-                self.uncommitted_patterns[pattern_path] = 'del'
+        # The entries come from the porcelain status gathered while probing
+        if self.status_entries is None:
+            p = self.__run_git('status', ['status', '--porcelain=v2', '-z', '--untracked-files=all'])
+            self.status_entries = []
+            if p is not None:
+                self.__parse_status(p.stdout)
+        for (xy, path, orig_path) in self.status_entries:
+            if orig_path and pat_file.search(orig_path):
+                self.uncommitted_patterns[orig_path] = 'del'
+            if not pat_file.search(path):
+                continue
+            if 'D' in xy:
+                self.uncommitted_patterns[path] = 'del'
+            elif xy == '??' or 'A' in xy or orig_path:
+                self.uncommitted_patterns[path] = 'add'
+            else:
+                self.uncommitted_patterns[path] = 'mod'
         self.msg.verbose("+ Patterns Found", str(len(self.uncommitted_patterns.keys())))
 
     def get_committed_list(self):
         self.msg.normal("Searching for local patterns", "Committed, not pushed")
-        prog = "git status"
-        p = sp.run(prog.split(), check=False, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
-        if p.returncode != 0:
-            print(p.stderr)
-            sys.exit(p.returncode)
-
-        prog = "git diff-tree --no-commit-id --name-only -r "
         self.committed_patterns = {}
         pat_file = re.compile("^patterns/.*")
-        new_file = re.compile("^new file:.*patterns/", re.IGNORECASE)
-        mod_file = re.compile("^modified:.*patterns/", re.IGNORECASE)
-        del_file = re.compile("^deleted:.*patterns/", re.IGNORECASE)
-
-        oldwd = os.getcwd()
-        os.chdir(self.path)
-        repo_range = self.__get_committed_repo_range()
-        commit_list = self.__get_committed_repo_uuid_list(repo_range)
-        pattern = re.compile("patterns/.*")
-        
-        for _commit in commit_list:
-            p = sp.run(prog + _commit, shell=True, check=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
-
-            for l in p.stdout.splitlines():
-                line = l.lstrip()
-                if pat_file.search(line):
-                    pattern_path = line
-                    self.committed_patterns[pattern_path] = 'add'
-                elif new_file.search(line):
-                    pattern_path = line.split()[-1]
-                    self.committed_patterns[pattern_path] = 'add'
-                elif mod_file.search(line):
-                    pattern_path = line.split()[-1]
-                    self.committed_patterns[pattern_path] = 'mod'
-                elif del_file.search(line):
-                    pattern_path = line.split()[-1]
-                    self.committed_patterns[pattern_path] = 'del'
-        os.chdir(oldwd)
+        actions = {'A': 'add', 'C': 'add', 'M': 'mod', 'T': 'mod', 'D': 'del'}
+        if not self.upstream:
+            self.msg.verbose("+ No remote branch to compare", self.info['name'])
+            return
+
+        # One diff from the merge base covers every unpushed commit
+        p = self.__run_git('committed', ['diff', '--name-status', '-z', '-M', self.upstream + '...HEAD'])
+        if p is None:
+            return
+        fields = p.stdout.split('\0')
+        i = 0
+        while i < len(fields) - 1:
+            status = fields[i]
+            path = fields[i+1]
+            i += 2
+            self.msg.debug("> {} {}".format(status, path))
+            if status.startswith('R'):
+                # Renames list the original path followed by the new one
+                if pat_file.search(path):
+                    self.committed_patterns[path] = 'del'
+                path = fields[i]
+                i += 1
+                if pat_file.search(path):
+                    self.committed_patterns[path] = 'add'
+            elif status.startswith('C'):
+                path = fields[i]
+                i += 1
+                if pat_file.search(path):
+                    self.committed_patterns[path] = 'add'
+            elif pat_file.search(path):
+                self.committed_patterns[path] = actions.get(status[:1], 'mod')
         self.msg.verbose("+ Patterns Found", str(len(self.committed_patterns)))
 
     def parse_local_patterns(self):
         pattern = re.compile("patterns/.*_SUSE-SU")
         self.local_sa_patterns = {}
         self.local_regular_patterns = {}
+        if not self.head_oid:
+            return
         self.get_uncommitted_list()
         self.get_committed_list()
         check_patterns = { **self.uncommitted_patterns, **self.committed_patterns } # Merge the two dictionaries
@@ -1686,22 +3775,18 @@ Class instance of {}
                 self.local_regular_patterns[key] = value
         self.msg.verbose("+ Security Patterns", str(len(self.local_sa_patterns)))
         self.msg.verbose("+ Regular Patterns", str(len(self.local_regular_patterns)))
+        self.__save_state()
 
     def get_local_sa_patterns(self):
+        if self.local_sa_patterns is None:
+            self.parse_local_patterns()
         return self.local_sa_patterns
 
     def get_local_regular_patterns(self):
+        if self.local_regular_patterns is None:
+            self.parse_local_patterns()
         return self.local_regular_patterns
 
-def base_files(_config):
-    base_dir = config_entry(_config.get("Common", "sca_base_dir"), '/')
-    files_found = []
-    for root, dirs, files in os.walk(base_dir, topdown = True):
-        for name in files:
-            files_found.append(os.path.join(root, name))
-    files_found.sort
-    return files_found
-
 def show_config_file(_config):
     """Dump the current configuration file object"""
     print("Config File: {0}\n".format(config_file))
@@ -1715,42 +3800,55 @@ def validate_sa_patterns(_config, _msg, patterns):
     _msg.normal("Searching for Security Patterns to Validate")
     pat_error_dir = config_entry(_config.get("Security", "pat_error"), '/')
     pat_dups_dir = config_entry(_config.get("Security", "pat_dups"), '/')
-    pattern_cache = []
     total = len(patterns)
     _msg.normal("+ Patterns Found", total)
     size = len(str(total))
 
-    _msg.normal("Building Pre-existing Pattern Cache")
-    sca_repo_dir = _config.get("Common", "sca_repo_dir")
-    for root, dirs, files in os.walk(sca_repo_dir):
-        for name in files:
-            pattern_cache.append(name)
-    _msg.normal("+ Patterns Cached", len(pattern_cache))
+    _msg.normal("Refreshing Pre-existing Pattern Index")
+    pattern_index = PatternIndex(_msg, _config)
+    _msg.normal("+ Patterns Indexed", len(pattern_index.get_names()))
 
     count = 0
     fatal = []
     duplicates = []
+    pending = []
     valid = 0
+    validator = PatternValidator(_msg, _config)
+    _msg.normal("+ Supportconfig Archives", len(validator.get_archives()))
+    _msg.normal("+ Validation Workers", validator.workers)
+    if( len(validator.get_archives()) == 0 ):
+        _msg.min("Error: No supportconfig archives found in {}\n".format(validator.arch_dir))
+        return total
     if( _msg.get_level() == _msg.LOG_MIN ):
         bar = ProgressBar("Validating: ", total)
     _msg.normal("Checking Patterns")
     for pattern in patterns:
-        count += 1
         pattern_file = os.path.basename(pattern)
-        _msg.normal("+ Pattern [{}/{}]".format(count, total), pattern_file)
-        if( pattern_file in pattern_cache ):
+        if pattern_index.contains(pattern_file) and not is_consolidated_pattern(pattern_file):
+            count += 1
+            _msg.normal("+ Pattern [{}/{}]".format(count, total), pattern_file + ", Duplicate")
             pattern_dup = pat_dups_dir + '/' + pattern_file
             os.rename(pattern, pattern_dup)
             duplicates.append(pattern_dup)
+            if( _msg.get_level() == _msg.LOG_MIN ):
+                bar.inc_count()
+                bar.update()
         else:
-            prog = "pat -l0 " + pattern
-            p = sp.run(prog, shell=True, check=False)
-            if p.returncode != 0:
-                pattern_error = pat_error_dir + '/' + pattern_file
-                os.rename(pattern, pattern_error)
-                fatal.append(pattern_error)
-            else:
-                valid += 1
+            pending.append(pattern)
+    for result in validator.validate(pending):
+        count += 1
+        pattern = result['pattern']
+        pattern_file = os.path.basename(pattern)
+        if result['valid']:
+            _msg.normal("+ Pattern [{}/{}]".format(count, total), pattern_file + ", Valid")
+            valid += 1
+        else:
+            _msg.normal("+ Pattern [{}/{}]".format(count, total), pattern_file + ", Fatal")
+            for error in result['errors']:
+                _msg.verbose("  + " + error)
+            pattern_error = pat_error_dir + '/' + pattern_file
+            os.rename(pattern, pattern_error)
+            fatal.append(pattern_error)
         if( _msg.get_level() == _msg.LOG_MIN ):
             bar.inc_count()
             bar.update()
@@ -1783,63 +3881,186 @@ def validate_sa_patterns(_config, _msg, patterns):
 
     return total
 
-def distribute_sa_patterns(_config, _msg, pattern_list):
-    """Distribute python patterns generated by sagen"""
-    _msg.normal("Retrieving pattern list to distribute")
-    pat_logs_dir = config_entry(_config.get("Security", "pat_logs"), '/')
+def is_consolidated_pattern(pattern_file):
+    "Returns True for a consolidated driver pattern, which replaces its previous version instead of being a duplicate"
+    return os.path.basename(pattern_file).startswith(sa_consolidated_base + "_") and pattern_file.endswith('.py')
+
+def plan_sa_distribution(_config, pattern_list):
+    "Buckets the patterns by the distribution suffix in their file names in one pass, returns the plan for each distribution"
     sca_repo_dir = config_entry(_config.get("Common", "sca_repo_dir"), '/')
     distro_list = config_entry(_config.get("Distribution", "supported")).split(",")
+    plan = {}
+    versions = {}
+    for distro in distro_list:
+        plan[distro] = []
+        distro_version = re.sub(r"sle(\d.*)sp(\d)", r"\1.\2", distro)
+        versions[distro_version] = distro
+    for pattern in pattern_list:
+        pattern_file = os.path.basename(pattern)
+        if not pattern_file.endswith('.py'):
+            continue
+        # Example: openssl_SUSE-SU-2023_0221-1_sles_15.4.ltss.py has the 15.4 suffix
+        suffix = pattern_file[:-3].split('_')[-1]
+        distro = versions.get('.'.join(suffix.split('.')[:2]))
+        if distro is None:
+            continue
+        distro_major = re.sub(r"sle(\d.*)sp(\d)", r"\1", distro)
+        distributed_dir = sca_repo_dir + "sca-patterns-sle" + str(distro_major) + "/patterns/SLE/" + distro
+        distributed_pattern = distributed_dir + "/" + pattern_file
+        if not os.path.isdir(distributed_dir):
+            action = 'missing'
+        elif os.path.isfile(distributed_pattern):
+            # The consolidated driver patterns keep their names and are replaced with each month's data
+            if is_consolidated_pattern(pattern_file):
+                action = 'update'
+            else:
+                action = 'duplicate'
+        else:
+            action = 'copy'
+        plan[distro].append({'pattern': pattern, 'target': distributed_pattern, 'repo': sca_repo_dir + "sca-patterns-sle" + str(distro_major), 'action': action})
+    return plan
+
+def copy_pattern_file(source, target, methods, replace = False):
+    "Copies the pattern with the first of the reflink, hardlink or copy methods the filesystem allows, returns the method used"
+    FICLONE = 0x40049409
+    if replace:
+        tmp_target = target + ".tmp"
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+        method = copy_pattern_file(source, tmp_target, methods)
+        os.replace(tmp_target, target)
+        if os.path.exists(tmp_target):
+            # Renaming a hard link onto the same file leaves both names in place
+            os.remove(tmp_target)
+        return method
+    for method in methods:
+        try:
+            if( method == 'reflink' ):
+                with open(source, 'rb') as src, open(target, 'xb') as dst:
+                    try:
+                        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+                    except OSError:
+                        dst.close()
+                        os.remove(target)
+                        raise
+                shutil.copymode(source, target)
+            elif( method == 'hardlink' ):
+                os.link(source, target)
+            else:
+                copyfile(source, target)
+            return method
+        except OSError:
+            continue
+    raise OSError("Cannot copy {0} to {1}".format(source, target))
+
+def stage_repo_files(_msg, repo, files, remove = False):
+    "Adds the files to, or removes them from, the git index of the repository in batches"
+    BATCH_SIZE = 500
+    if not os.path.exists(repo + "/.git"):
+        return False
+    rc = True
+    for i in range(0, len(files), BATCH_SIZE):
+        batch = [os.path.relpath(_file, repo) for _file in files[i:i + BATCH_SIZE]]
+        if remove:
+            cmd = ['/usr/bin/git', 'rm', '--cached', '-q', '--ignore-unmatch', '--'] + batch
+        else:
+            cmd = ['/usr/bin/git', 'add', '--'] + batch
+        try:
+            p = sp.run(cmd, cwd=repo, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+        except Exception as error:
+            _msg.normal("+ Error: Cannot stage files in {0}: {1}".format(repo, error))
+            return False
+        if p.returncode > 0:
+            _msg.normal("+ Error: Cannot stage files in {0}: {1}".format(repo, p.stderr.strip()))
+            rc = False
+    return rc
+
+def load_distribution_log(_config, total):
+    "Returns the distribution log without obsolete entries, or a new one for the total number of patterns"
+    pat_logs_dir = config_entry(_config.get("Security", "pat_logs"), '/')
+    distro_list = config_entry(_config.get("Distribution", "supported")).split(",")
     sa_log_file = pat_logs_dir + sa_distribution_log_filename
-    total = len(pattern_list)
     log = configparser.ConfigParser()
     log.optionxform = str # Ensures manifest keys are saved as case sensitive and not lowercase
     # Remove any obsolete log entries
     if os.path.exists(sa_log_file):
         log.read(sa_log_file)
         for distro in distro_list:
-            count = int(log[distro]['Count'])
-            if count > 0:
-                for _file, value in log.items(distro):
-                    if value == "Distributed":
-                        if not os.path.exists(_file):
-                            log.remove_option(distro, _file)
+            if not log.has_section(distro):
+                log.add_section(distro)
+                continue
+            for _file, value in log.items(distro):
+                if value == "Distributed":
+                    if not os.path.exists(_file):
+                        log.remove_option(distro, _file)
     else:
-        log.add_section('Main')
-        log['Main']['Total'] = str(total)
+        log.add_section(sa_main_section)
+        log[sa_main_section]['Total'] = str(total)
         for distro in distro_list:
             log.add_section(distro)
+    return log
+
+def distribute_sa_patterns(_config, _msg, pattern_list, dry_run = False):
+    """Distribute python patterns generated by sagen"""
+    _msg.normal("Retrieving pattern list to distribute")
+    pat_logs_dir = config_entry(_config.get("Security", "pat_logs"), '/')
+    distro_list = config_entry(_config.get("Distribution", "supported")).split(",")
+    methods = config_option(_config, "Security", "distribute_methods", "reflink,copy").split(',')
+    sa_log_file = pat_logs_dir + sa_distribution_log_filename
+    total = len(pattern_list)
+    log = load_distribution_log(_config, total)
 
     _msg.normal("Distributing patterns to associated distributions")
+    plan = plan_sa_distribution(_config, pattern_list)
+    copies = []
     for distro in distro_list:
         _msg.normal("Evaluating " + distro)
-        count = 0
-        distro_major = re.sub(r"sle(\d.*)sp(\d)", r"\1", distro)
-        distro_version = re.sub(r"sle(\d.*)sp(\d)", r"\1.\2", distro)
-        distro_str = "_" + str(distro_version) + ".*py$"
-        matchdistro = re.compile(distro_str)
-        for pattern in pattern_list:
-            if matchdistro.search(pattern):
-                _msg.verbose("+ Pattern {}".format(pattern))
-                _msg.verbose("+ Pattern to distro", 'MATCHED')
-                count += 1
-                pattern_file = os.path.basename(pattern)
-                distributed_dir = sca_repo_dir + "sca-patterns-sle" + str(distro_major) + "/patterns/SLE/" + distro
-                if( os.path.exists(distributed_dir) ):
-                    distributed_pattern = distributed_dir + "/" + pattern_file
-                    if( os.path.isfile(distributed_pattern) ):
-                        _msg.normal("+ Error: Duplicate file found - {0}".format(distributed_pattern))
-                    else:
-                        _msg.verbose("+ Copy {0} to \n       {1}".format(pattern, distributed_pattern))
-                        copyfile(pattern, distributed_pattern)
-                        log[distro][distributed_pattern] = 'Distributed'
-                        _msg.verbose()
-                else:
-                    _msg.normal("Error: Directory not found - {0}".format(distributed_dir))
-        
-        log[distro]['Count'] = str(count)
+        for entry in plan[distro]:
+            _msg.verbose("+ Pattern {}".format(entry['pattern']))
+            if( entry['action'] == 'missing' ):
+                _msg.normal("Error: Directory not found - {0}".format(os.path.dirname(entry['target'])))
+            elif( entry['action'] == 'duplicate' ):
+                _msg.normal("+ Error: Duplicate file found - {0}".format(entry['target']))
+            elif( entry['action'] == 'update' ):
+                _msg.verbose("+ Update {0} to \n       {1}".format(entry['pattern'], entry['target']))
+                copies.append((distro, entry))
+            else:
+                _msg.verbose("+ Copy {0} to \n       {1}".format(entry['pattern'], entry['target']))
+                copies.append((distro, entry))
+        count = len(plan[distro])
         if count > 0:
             _msg.min(SUMMARY_FMT.format("+ " + distro + ":", count))
 
+    if dry_run:
+        _msg.min(SUMMARY_FMT.format("Patterns to copy:", len(copies)))
+        _msg.min("Dry run, no patterns distributed")
+        _msg.min()
+        return total
+
+    methods_used = {}
+    staged = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+        futures = {executor.submit(copy_pattern_file, entry['pattern'], entry['target'], methods, entry['action'] == 'update'): (distro, entry) for distro, entry in copies}
+        for future in concurrent.futures.as_completed(futures):
+            (distro, entry) = futures[future]
+            try:
+                method = future.result()
+            except OSError as error:
+                _msg.normal("+ Error: {0}".format(error))
+                continue
+            methods_used[method] = methods_used.get(method, 0) + 1
+            log[distro][entry['target']] = 'Distributed'
+            staged.setdefault(entry['repo'], []).append(entry['target'])
+    for distro in distro_list:
+        log[distro]['Count'] = str(len(plan[distro]))
+    for method, count in methods_used.items():
+        _msg.verbose("+ Copied with " + method, str(count))
+
+    _msg.normal("Staging patterns in repositories")
+    for repo, files in staged.items():
+        if stage_repo_files(_msg, repo, sorted(files)):
+            _msg.verbose("+ Staged {0}".format(repo), str(len(files)))
+
     _msg.normal("Writing to log file", sa_log_file)
     with open(sa_log_file, 'w') as logfile:
         log.write(logfile)
@@ -1857,17 +4078,23 @@ def remove_sa_patterns(_config, _msg):
         log.optionxform = str # Ensures manifest keys are saved as case sensitive and not lowercase
         log.read(sa_log_file)
         total = log.get(sa_main_section, "Total")
+        sca_repo_dir = config_entry(_config.get("Common", "sca_repo_dir"), '/')
+        unstage = {}
         for distro in log.sections():
             _msg.normal("Evaluating " + distro)
             if distro == sa_main_section:
                 continue
-            count = int(log.get(distro, 'Count'))
+            count = int(log.get(distro, 'Count', fallback='0'))
             if count > 0:
                 for _file, value in log.items(distro):
                     if value == "Distributed" and os.path.exists(_file):
                         _msg.normal("+ Deleting", _file)
                         os.remove(_file)
+                        repo = sca_repo_dir + os.path.relpath(_file, sca_repo_dir).split('/')[0]
+                        unstage.setdefault(repo, []).append(_file)
                 _msg.min("+ {}".format(distro), str(count))
+        for repo, files in unstage.items():
+            stage_repo_files(_msg, repo, files, remove = True)
         os.remove(sa_log_file)
         _msg.min()
         return True
@@ -1901,6 +4128,7 @@ def reset_sa_patterns(_config, _msg):
             manifest.optionxform = str # Ensures manifest keys are saved as case sensitive and not lowercase
             manifest.read(manifest_file)
             sections = manifest.sections()
+            url_date = manifest.get('metadata', 'url_date', fallback='')
             for section in sections:
                 for key, value in manifest.items(section):
                     if section == "metadata" or key == "status":
@@ -1932,6 +4160,12 @@ def reset_sa_patterns(_config, _msg):
                     _msg.normal("  - Delete {}".format(_file))
                     os.remove(_file)
                     count += 1
+            if url_date:
+                store = AnnouncementStore(_msg, pat_logs, url_date)
+                stored = store.remove(sections)
+                if stored > 0:
+                    _msg.normal("  - Delete {} from {}".format(stored, store.path))
+                    count += stored
             if count > 0:
                 _msg.min("  - Files removed", str(count))
             else:
@@ -1940,11 +4174,11 @@ def reset_sa_patterns(_config, _msg):
             # Remove the manifest file
             _msg.min("+ Removing manifest file")
             count = 0
-            _file = manifest_file
-            if os.path.exists(_file):
-                _msg.normal("  - Delete {}".format(_file))
-                os.remove(_file)
-                count += 1
+            for _file in [manifest_file, pat_logs + sa_pipeline_prefix + url_date + ".cfg"]:
+                if os.path.exists(_file):
+                    _msg.normal("  - Delete {}".format(_file))
+                    os.remove(_file)
+                    count += 1
             if count > 0:
                 _msg.min("  - Files removed", str(count))
             else:
@@ -1957,54 +4191,41 @@ def reset_sa_patterns(_config, _msg):
 
 
 def show_status(_config, _msg):
-    base_files_list = base_files(_config)
+    snapshot = StatusSnapshot(_msg, _config)
     sca_arch_dir = config_entry(_config.get("Common", "sca_arch_dir"), '/')
-    pat_dir = config_entry(_config.get("Security", "pat_dir"), '/')
-    pat_dups_dir = config_entry(_config.get("Security", "pat_dups"), '/')
     pat_logs_dir = config_entry(_config.get("Security", "pat_logs"), '/')
-    pat_error_dir = config_entry(_config.get("Security", "pat_error"), '/')
     repo_dir = config_entry(_config.get("Common", "sca_repo_dir"), '/')
     repo_list = config_entry(_config.get("GitHub", "patdev_repos")).split(',')
     sa_log_file = pat_logs_dir + sa_distribution_log_filename
-    _pattern = re.compile(pat_dir + ".*py$|" + pat_dir + ".*pl$")
-    _duplicates = re.compile(pat_dups_dir + ".*")
-    _logs = re.compile(pat_logs_dir + ".*")
-    _errors = re.compile(pat_error_dir + ".*")
-    _sa_pattern = re.compile("/.*_SUSE-SU")
     pattern_list = []
     sa_pattern_list = []
     reg_pattern_list = []
-    duplicates_list = []
-    logs_list = []
-    errors_list = []
-    archive_list = get_archive_list(sca_arch_dir)
+    duplicates_list = snapshot.get_files('duplicates')
+    logs_list = snapshot.get_files('logs')
+    errors_list = snapshot.get_files('errors')
+    archive_list = snapshot.get_files('archives')
     outdated_repo_list = []
     missing_repo_list = []
     invalid_repo_list = []
     pre_pattern_str = " + "
+    sa_pattern = re.compile(sa_pattern_filter)
 
-    for file in base_files_list:
-        if _pattern.search(file):
+    for file in snapshot.get_files('patterns'):
+        if file.endswith('.py') or file.endswith('.pl'):
             pattern_list.append(file)
-            if _sa_pattern.search(file):
+            if sa_pattern.search(file):
                 sa_pattern_list.append(file)
             else:
                 reg_pattern_list.append(file)
-        if _duplicates.search(file):
-            duplicates_list.append(file)
-        if _logs.search(file):
-            logs_list.append(file)
-        if _errors.search(file):
-            errors_list.append(file)
 
     test_archives = len(archive_list)
-    repo_exception = re.compile("sca-patterns-base|sca-server-report")
-    for repo in repo_list:
-        if repo_exception.search(repo):
-            continue
-        path = repo_dir + repo
-        git_repo = GitHubRepository(_msg, path)
+    repo_exception = re.compile(pattern_repo_exception)
+    repo_paths = [repo_dir + repo for repo in repo_list if not repo_exception.search(repo)]
+    state_keys = {}
+    for git_repo in probe_git_repos(_msg, repo_paths, _config=_config):
+        path = git_repo.path
         repo_data = git_repo.get_info()
+        state_keys[repo_data['name']] = git_repo.state_key
         _msg.debug(" <> {}: Valid: {}, State: {}".format(repo_data['name'], repo_data['valid'], repo_data['state']))
         if repo_data['valid']:
             if repo_data['outdated']:
@@ -2014,6 +4235,11 @@ def show_status(_config, _msg):
         else:
             invalid_repo_list.append(path)
 
+    # The excluded repositories are probed quietly for the pattern index state keys
+    other_paths = [repo_dir + repo for repo in repo_list if repo_exception.search(repo)]
+    for git_repo in probe_git_repos(DisplayMessages(_msg.LOG_QUIET), other_paths, _config=_config):
+        state_keys[git_repo.info['name']] = git_repo.state_key
+
     outdated_pattern_repos = len(outdated_repo_list)
     missing_pattern_repos = len(missing_repo_list)
     invalid_pattern_repos = len(invalid_repo_list)
@@ -2077,6 +4303,12 @@ def show_status(_config, _msg):
             _msg.normal(pre_pattern_str + pattern)
 
 
+    repo_patterns = PatternIndex(_msg, _config, _state_keys=state_keys).get_pattern_files()
+    _msg.min("Repository Patterns", str(len(repo_patterns)))
+    if _msg.get_level() >= _msg.LOG_VERBOSE:
+        for pattern in repo_patterns:
+            _msg.verbose(pre_pattern_str + pattern)
+
     if missing_pattern_repos > 0:
         _msg.min("Missing Repositories", str(missing_pattern_repos))
         _msg.min("+ Try running: samgr --repos")
@@ -2100,6 +4332,29 @@ def show_status(_config, _msg):
 
     _msg.min()
 
+def probe_git_repos(_msg, _path_list, _prepare=None, _config=None):
+    """Yields a GitHubRepository for each path in _path_list, in the same order
+
+    The repositories are probed concurrently. Each repository's messages are
+    buffered in the worker and printed when its result is yielded, so they do
+    not interleave. The optional _prepare function is called with each
+    repository in the worker thread to gather anything else the caller needs,
+    like the local pattern lists. With _config the repository state cache is used.
+    """
+    def probe(path):
+        git_repo = GitHubRepository(DisplayMessages(_msg.get_level(), True), path, _config)
+        if _prepare is not None and git_repo.get_info()['valid']:
+            _prepare(git_repo)
+        return git_repo
+
+    if len(_path_list) == 0:
+        return
+    workers = min(git_probe_workers, len(_path_list))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for git_repo in executor.map(probe, _path_list):
+            git_repo.msg.flush()
+            yield git_repo
+
 def github_path_valid(msg, path):
     rc = True
     git_config_file = path + "/.git/config"
@@ -2250,17 +4505,22 @@ def get_pattern_list(this_path, _recurse = True):
     return this_list
 
 def get_links_from_pattern_file(this_pattern):
-    these_urls = []
     try:
         f = open(this_pattern, "r")
     except Exception as error:
         print("Error: Cannot open pattern: ", str(error))
-        return these_urls
+        return []
+    lines = f.readlines()
+    f.close()
+    return get_links_from_pattern_lines(lines)
 
+def get_links_from_pattern_lines(lines):
+    "Returns the META_LINK URLs found in the lines of a python or perl pattern"
+    these_urls = []
     type_python = False
     type_perl = False
     
-    for line in f.readlines():
+    for line in lines:
         line = line.strip("\n")
         if type_python:
             if find_links.search(line):
@@ -2279,80 +4539,222 @@ def get_links_from_pattern_file(this_pattern):
             elif "#!/usr/bin/perl" in line:
                 type_perl = True
                 find_links = re.compile('^.*"META_LINK_.*=', re.IGNORECASE)
-    f.close()
 #    print(these_urls)
 
     return these_urls
 
-def validate_link_list(link_list, _c_, _msg):
+def validate_link_list(link_list, _c_, _msg, _validator = None, _bar = None):
+    "Validates the links concurrently, returns the invalid links and the updated counters"
     bad_links = {}
     vdisplay = "  {0:23} {1}"
-    oldhosts = re.compile("novell.com|microfocus.com", re.IGNORECASE)
-    for link in link_list:
+    validator = _validator
+    if validator is None:
+        validator = LinkValidator(_msg)
+    futures = validator.submit_links(link_list)
+    for link, future in zip(link_list, futures):
         _c_['link_total'] += 1
-        status = "+ Confirmed"
         _c_['active_link'] = link
-        try:
-            x = requests.get(link, timeout=10)
-            x.raise_for_status()
-        except requests.exceptions.HTTPError as errh:
-            status = "- Invalid URL"
-            _c_['badurl'] += 1
-            bad_links[link] = "Invalid URL"
-            _msg.normal(vdisplay.format(status, link))
-            continue
-        except requests.exceptions.ConnectionError as errc:
-            status = "- Invalid Connection"
-            _c_['badconnection'] += 1
-            bad_links[link] = "Invalid Connection"
-            _msg.normal(vdisplay.format(status, link))
-            continue
-        except requests.exceptions.Timeout as errt:
-            status = "- Server Timeout"
-            _c_['ping'] += 1
-            bad_links[link] = "Server Timeout"
-            _msg.normal(vdisplay.format(status, link))
-            continue
-        except requests.exceptions.RequestException as err:
-            status = "- Invalid URL"
-            _c_['badurl'] += 1
-            bad_links[link] = "Invalid URL"
-            _msg.normal(vdisplay.format(status, link))
-            continue
-        except Exception as error:
-            status = "- Unknown Error"
-            _c_['ping'] += 1
-            bad_links[link] = "Unknown Error"
-            _msg.normal(vdisplay.format(status, link))
-            continue
-
-
-        urlhost = link.split('/')[2]
-        if oldhosts.search(urlhost):
-            status = "- Old Host"
-            _c_['oldhosts'] += 1
-            bad_links[link] = "Old Host"
-            _msg.normal(vdisplay.format(status, link))
-            continue
-
-        if( x.status_code == 200 ):
-            data = x.text.split('\n')
-            badlink = re.compile('Invalid Bug ID|You must enter a valid bug number', re.IGNORECASE)
-            badvideo = re.compile('This video isn\'t available anymore', re.IGNORECASE)
-            for line in data:
-                if badlink.search(line):
-                    status = "- Invalid BUG"
-                    _c_['bugid'] += 1
-                    bad_links[link] = "Invalid BUG"
-                    break
-                elif badvideo.search(line):
-                    status = "- Invalid URL"
-                    _c_['badurl'] += 1
-                    bad_links[link] = "Invalid URL"
-                    break
-        _msg.verbose(vdisplay.format(status, link))
+        status = future.result()
+        if( status == LinkValidator.CONFIRMED ):
+            _msg.verbose(vdisplay.format("+ " + status, link))
+        else:
+            _c_[LinkValidator.STATUS_COUNTERS[status]] += 1
+            bad_links[link] = status
+            _msg.normal(vdisplay.format("- " + status, link))
+        if _bar is not None:
+            _bar.inc_count()
+            _bar.update()
+    if _validator is None:
+        validator.close()
     return bad_links, _c_
 
+def get_archive_index_pairs(lines):
+    "Returns a dictionary of announcement IDs and HTML file names from a pipermail month index"
+    IDX_FILENAME = 1
+    IDX_SAIDPART = 2
+    IDX_SAID = 0
+    said_file_pairs = {}
+    distrotag = re.compile('\<LI>\<A HREF.*>SUSE-SU-', re.IGNORECASE)
+    for line in lines:
+        if distrotag.search(line):
+            # Example: <LI><A HREF="011729.html">SUSE-SU-2022:2608-1: important: Security update for booth
+            htmlfile = line.split('"')[IDX_FILENAME] # parse out the HREF filename
+            htmlsaid = line.split('"')[IDX_SAIDPART].split()[IDX_SAID].strip('>:')
+            said_file_pairs[htmlsaid] = htmlfile
+    return said_file_pairs
+
+def get_mirror_index_pairs(month_dir):
+    "Returns the announcement ID and file pairs for a local pipermail month directory"
+    for index_name in ['date.html', 'thread.html', 'index.html', 'subject.html']:
+        index_file = os.path.join(month_dir, index_name)
+        if os.path.exists(index_file):
+            with open(index_file, "r", errors="replace") as f:
+                return get_archive_index_pairs(f.readlines())
+    # No index file, assume every numbered message file is an announcement
+    said_file_pairs = {}
+    message_file = re.compile(r"^\d+\.html$")
+    for entry in sorted(os.listdir(month_dir)):
+        if message_file.search(entry):
+            said_file_pairs[entry] = entry
+    return said_file_pairs
+
+def get_monthly_archive_messages(_msg, archive_url):
+    "Streams and decompresses a gzipped pipermail monthly archive, returns a dictionary of announcement IDs and message body lines"
+    messages = {}
+    said_subject = re.compile(r"^Subject:\s*(?:\[[^\]]*\]\s*)*(SUSE-SU-\d+:\d+-\d+)", re.IGNORECASE)
+    _msg.debug("Monthly Archive", archive_url)
+    try:
+        x = requests.get(archive_url, stream=True, timeout=60)
+    except Exception as error:
+        _msg.min(' ERROR', "Cannot download " + str(archive_url) + ": " + str(error))
+        return messages
+    if( x.status_code != 200 ):
+        _msg.min("ERROR " + str(x.status_code), "URL download failure - " + str(archive_url))
+        return messages
+
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    state = {'said': '', 'in_header': False, 'subject': '', 'body': [], 'previous_blank': True}
+
+    def close_message():
+        if state['said'] and state['said'] not in messages:
+            messages[state['said']] = state['body']
+        state['said'] = ''
+        state['subject'] = ''
+        state['body'] = []
+
+    def add_line(line):
+        if line.startswith("From ") and state['previous_blank']:
+            close_message()
+            state['in_header'] = True
+        elif state['in_header']:
+            if( len(line) == 0 ):
+                state['in_header'] = False
+                found = said_subject.search(state['subject'])
+                if found:
+                    state['said'] = found.group(1)
+            elif line.startswith("Subject:"):
+                state['subject'] = line
+            elif( line[:1] in (' ', '\t') and state['subject'] and not state['said'] ):
+                state['subject'] += line
+        elif state['said']:
+            state['body'].append(line)
+        state['previous_blank'] = ( len(line) == 0 )
+
+    remainder = b''
+    try:
+        for chunk in x.iter_content(chunk_size=65536):
+            data = remainder + decompressor.decompress(chunk)
+            lines = data.split(b'\n')
+            remainder = lines.pop()
+            for line in lines:
+                add_line(line.decode('utf-8', errors='replace').rstrip('\r'))
+        remainder += decompressor.flush()
+    except Exception as error:
+        _msg.min(' ERROR', "Cannot decompress " + str(archive_url) + ": " + str(error))
+        return {}
+    if remainder:
+        add_line(remainder.decode('utf-8', errors='replace').rstrip('\r'))
+    close_message()
+    _msg.debug("Monthly Archive Announcements", str(len(messages)))
+    return messages
+
+_ingest_worker = {}
+
+def ingest_announcement_file(task):
+    "Process pool worker that parses one local announcement file and writes its SLES patterns"
+    (path, source_url, sa_file, version, consolidate, config_sections) = task
+    if not _ingest_worker:
+        # Each worker process builds the configuration it was given once and keeps quiet to avoid interleaved output
+        _config = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
+        _config.read_dict(config_sections)
+        _ingest_worker['config'] = _config
+        _ingest_worker['msg'] = DisplayMessages(DisplayMessages.LOG_QUIET)
+    result = {'file': sa_file, 'stats': {'a_errors': 0}, 'patterns': {}, 'record': None, 'create_list': []}
+    try:
+        security = SecurityAnnouncement(_ingest_worker['msg'], _ingest_worker['config'], source_url, sa_file, version, _path=path)
+        result['create_list'] = security.get_list(sa_sles_distros)
+        if consolidate:
+            security.count_consolidated(result['create_list'])
+        else:
+            security.create_patterns(result['create_list'], sa_sles_tag)
+    except (SystemExit, Exception):
+        # The record stays None so sagen marks the announcement as a Read_Error and continues
+        result['stats'] = {'a_errors': 1}
+        result['create_list'] = []
+        return result
+    result['stats'] = security.get_stats()
+    result['patterns'] = security.get_patterns()
+    result['record'] = security.get_record()
+    return result
+
+def parse_sa_pattern_file(pattern_file):
+    "Returns the announcement data found in a security announcement pattern generated by sagen, or None"
+    filename_tag = re.compile(r"_SUSE-SU-\d+_\d+-\d+_(.*?)_?\d+\.\d+(\.ltss)?\.py$")
+    string_value = re.compile(r"^\s+(name|severity|tag) = '(.*)'")
+    distro_value = re.compile(r"server\['(DistroVersion|DistroPatchLevel)'\] == (\d+)")
+    package_value = re.compile(r"^\s+'(.*)': '(.*)',$")
+    links_value = re.compile(r'^other_links = "META_LINK_Security=(.*)"')
+    parts = filename_tag.search(os.path.basename(pattern_file))
+    if not parts:
+        return None
+    data = {'pattern_tag': parts.group(1), 'major': '', 'minor': '', 'ltss': False, 'name': '', 'severity': '', 'tag': '', 'url': '', 'packages': {}}
+    with open(pattern_file, "r") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            value = string_value.search(line)
+            if value:
+                data[value.group(1)] = value.group(2)
+                continue
+            value = distro_value.search(line)
+            if value:
+                if value.group(1) == 'DistroVersion':
+                    data['major'] = value.group(2)
+                else:
+                    data['minor'] = value.group(2)
+                continue
+            value = package_value.search(line)
+            if value:
+                data['packages'][value.group(1)] = value.group(2)
+                continue
+            value = links_value.search(line)
+            if value:
+                data['url'] = value.group(1)
+            elif line.strip() == "ltss = True":
+                data['ltss'] = True
+    if not data['tag'] or not data['major'] or not data['minor']:
+        return None
+    return data
+
+def parse_distro_version(distro_str):
+    "Converts distribution strings like 15.4, 15sp4, sle15sp4 or 12.5.ltss to a (major, minor, ltss) tuple"
+    this_str = distro_str.lower()
+    ltss = None
+    if 'ltss' in this_str:
+        ltss = True
+        this_str = this_str.replace('ltss', '')
+    parts = re.match(r"^(?:sles|sle)?(\d+)(?:(?:\.|-?sp)(\d+))?", this_str.strip('.-_ '))
+    if parts:
+        major = parts.group(1)
+        minor = parts.group(2) or ''
+    else:
+        major = this_str
+        minor = ''
+    return major, minor, ltss
+
+def get_cache_dir(_config):
+    "Returns the cache directory, creating it when missing"
+    sca_base_dir = config_entry(_config.get("Common", "sca_base_dir"), '/')
+    cache_dir = config_entry(config_option(_config, "Common", "sca_cache_dir", sca_base_dir + "cache/"), '/')
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+def config_option(_config, section, option, default = ''):
+    "Returns the formatted configuration entry or the default if the option is missing"
+    if _config.has_option(section, option):
+        return config_entry(_config.get(section, option))
+    return default
+
 def config_entry(_entry, trailer = ''):
     formatted_entry = _entry.strip('\"\'')
     if( len(trailer) > 0 ):
@@ -2375,38 +4777,227 @@ def check_git_repos(config, msg):
         update_git_repos(config, msg, bar)
         bar.finish()
 
-def update_git_repos(_config, _msg, _bar):
-    sca_repo_dir = config_entry(_config.get("Common", "sca_repo_dir"))
+def update_git_repo(_config, _repo):
+    """Pulls or clones one repository, returns its update result
+
+    A repository fetched within [GitHub] fetch_ttl seconds is left alone. New clones
+    use a blob-less partial clone with [GitHub] partial_clone, check out only the
+    [GitHub] sparse_checkout directories of pattern repositories and borrow objects
+    from the [GitHub] object_store repository when one is configured.
+    """
+    sca_repo_dir = config_entry(_config.get("Common", "sca_repo_dir"), '/')
+    github_uri_base = config_entry(_config.get("GitHub", "uri_base"))
+    try:
+        fetch_ttl = int(config_option(_config, "GitHub", "fetch_ttl", '0'))
+    except ValueError:
+        fetch_ttl = 0
+    partial_clone = config_option(_config, "GitHub", "partial_clone", 'False').lower() in ('true', 'yes', '1')
+    sparse_dirs = [x.strip() for x in config_option(_config, "GitHub", "sparse_checkout").split(',') if x.strip()]
+    object_store = get_object_store(_config)
+    repo_path = sca_repo_dir + _repo
+    result = {'repo': _repo, 'action': 'pull', 'prog': '', 'returncode': 0, 'stdout': '', 'stderr': ''}
+    progs = []
+    if os.path.exists(repo_path):
+        fetch_head = repo_path + "/.git/FETCH_HEAD"
+        if fetch_ttl > 0 and os.path.exists(fetch_head):
+            if datetime.datetime.now().timestamp() - os.stat(fetch_head).st_mtime < fetch_ttl:
+                result['action'] = 'fresh'
+                return result
+        progs.append(['git', '-C', repo_path, 'pull'])
+    else:
+        result['action'] = 'clone'
+        prog = ['git', '-C', sca_repo_dir, 'clone']
+        if partial_clone:
+            prog.append('--filter=blob:none')
+        sparse = len(sparse_dirs) > 0 and not re.search(pattern_repo_exception, _repo)
+        if sparse:
+            prog.append('--sparse')
+        if object_store:
+            prog.extend(['--reference-if-able', object_store])
+        progs.append(prog + [github_uri_base + "/" + _repo + ".git"])
+        if sparse:
+            progs.append(['git', '-C', repo_path, 'sparse-checkout', 'set'] + sparse_dirs)
+
+    for prog in progs:
+        result['prog'] = ' '.join(prog)
+        try:
+            p = sp.run(prog, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+        except Exception as e:
+            result['returncode'] = -1
+            result['stderr'] = str(e)
+            break
+        result['returncode'] = p.returncode
+        result['stdout'] += p.stdout
+        result['stderr'] += p.stderr
+        if p.returncode != 0:
+            break
+
+    return result
+
+def get_object_store(_config, _msg = None):
+    """Returns the path of the shared object store repository, or an empty string if none is configured
+
+    The path must be absolute, the alternates of the clones would resolve a relative one
+    against their own objects directory.
+    """
+    object_store = config_option(_config, "GitHub", "object_store")
+    if not object_store:
+        return ''
+    if not os.path.isabs(object_store):
+        if _msg is not None:
+            _msg.min("ERROR: Object store must be an absolute path", object_store)
+        return ''
+    return os.path.normpath(object_store)
+
+def run_git_command(_msg, prog):
+    "Runs a git command list, returns True on success and shows the output on failure"
+    try:
+        p = sp.run(prog, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+    except Exception as e:
+        _msg.normal("+ Exception: Command failed - " + ' '.join(prog))
+        _msg.normal()
+        _msg.normal(str(e))
+        return False
+    if p.returncode != 0:
+        _msg.normal("+ ERROR: Command failed - " + ' '.join(prog))
+        _msg.normal()
+        _msg.normal(p.stdout)
+        _msg.normal(p.stderr)
+        return False
+    _msg.debug("<> Command Output", ' '.join(prog))
+    if p.stdout:
+        _msg.debug(p.stdout)
+    return True
+
+def update_object_store(_config, _msg, _force = False):
+    """Creates the shared object store and fetches every pattern repository into it
+
+    The object store is a bare repository with one remote per pattern repository. The
+    clones reference it through their alternates, so each object is only stored and
+    fetched once. The store is not fetched again within [GitHub] fetch_ttl seconds,
+    unless _force is set. Returns False if the store could not be updated.
+    """
+    object_store = get_object_store(_config, _msg)
+    if not object_store:
+        return True
     github_uri_base = config_entry(_config.get("GitHub", "uri_base"))
     patdev_repos = config_entry(_config.get("GitHub", "patdev_repos")).split(',')
+    try:
+        fetch_ttl = int(config_option(_config, "GitHub", "fetch_ttl", '0'))
+    except ValueError:
+        fetch_ttl = 0
+    if not os.path.exists(object_store + "/HEAD"):
+        _msg.normal("+ Creating Object Store", object_store)
+        if not run_git_command(_msg, ['git', 'init', '-q', '--bare', object_store]):
+            return False
+    # The clones depend on the store objects, an automatic gc must never prune them
+    for key, value in (('gc.auto', '0'), ('gc.pruneExpire', 'never')):
+        if not run_git_command(_msg, ['git', '-C', object_store, 'config', key, value]):
+            return False
+    fetch_head = object_store + "/FETCH_HEAD"
+    if not _force and fetch_ttl > 0 and os.path.exists(fetch_head):
+        if datetime.datetime.now().timestamp() - os.stat(fetch_head).st_mtime < fetch_ttl:
+            _msg.normal("+ Object Store is Current", object_store)
+            return True
 
+    p = sp.run(['git', '-C', object_store, 'remote'], universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+    remotes = p.stdout.split()
     for repo in patdev_repos:
-        repo_path = sca_repo_dir + repo
-        if os.path.exists(repo_path):
-            _msg.normal("+ Updating Local Repository", repo)
-            prog = "git -C " + repo_path + " pull"
+        url = github_uri_base + "/" + repo + ".git"
+        if repo in remotes:
+            prog = ['git', '-C', object_store, 'remote', 'set-url', repo, url]
         else:
-            _msg.normal("+ Cloning GitHub Repository", repo)
-            prog = "git -C " + sca_repo_dir + " clone " + github_uri_base + "/" + repo + ".git"
-
-        try:
-            p = sp.run(prog.split(), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
-        except Exception as e:
-            _msg.normal("+ Exception: Command failed - " + prog)
-            _msg.normal()
-            _msg.normal(p.stdout)
-            _msg.normal(p.stderr)
+            prog = ['git', '-C', object_store, 'remote', 'add', '--no-tags', repo, url]
+        if not run_git_command(_msg, prog):
+            return False
+    try:
+        workers = int(config_option(_config, "GitHub", "update_workers", '4'))
+    except ValueError:
+        workers = 4
+    _msg.normal("+ Updating Object Store", object_store)
+    return run_git_command(_msg, ['git', '-C', object_store, 'fetch', '-q', '--prune', '--jobs=' + str(max(workers, 1)), '--multiple'] + patdev_repos)
+
+def maintain_git_repos(_config, _msg):
+    """Keeps the shared object store and the pattern repositories compact
+
+    Every existing clone is linked to the object store and repacked without the objects
+    the store already holds. The store itself is repacked without ever pruning, because
+    the clones may depend on objects that are no longer referenced by a remote.
+    Returns the number of repositories that failed maintenance.
+    """
+    sca_repo_dir = config_entry(_config.get("Common", "sca_repo_dir"), '/')
+    patdev_repos = config_entry(_config.get("GitHub", "patdev_repos")).split(',')
+    object_store = get_object_store(_config, _msg)
+    failed = 0
+    if object_store:
+        if not update_object_store(_config, _msg, _force = True):
+            return len(patdev_repos)
+        _msg.normal("+ Repacking Object Store", object_store)
+        if not run_git_command(_msg, ['git', '-C', object_store, 'repack', '-a', '-d', '-q', '--keep-unreachable']):
+            failed += 1
+        run_git_command(_msg, ['git', '-C', object_store, 'pack-refs', '--all'])
+    else:
+        _msg.normal("+ No object store configured", "[GitHub] object_store")
 
-        if p.returncode != 0:
-            _msg.normal("+ ERROR: Command failed - " + prog)
-            _msg.normal()
-            _msg.normal(p.stdout)
-            _msg.normal(p.stderr)
+    for repo in patdev_repos:
+        repo_path = sca_repo_dir + repo
+        if not os.path.exists(repo_path + "/.git"):
+            _msg.normal("+ Missing Repository", repo)
+            continue
+        _msg.normal("+ Maintaining Repository", repo)
+        if object_store:
+            alternates = repo_path + "/.git/objects/info/alternates"
+            store_objects = object_store + "/objects"
+            linked = []
+            if os.path.exists(alternates):
+                with open(alternates, "r") as f:
+                    linked = [line.strip() for line in f if line.strip()]
+            if store_objects not in linked:
+                _msg.verbose("+ Linking Object Store", repo)
+                with open(alternates, "a") as f:
+                    f.write(store_objects + "\n")
+            # -l leaves the objects found in the object store out of the local packs
+            prog = ['git', '-C', repo_path, 'repack', '-a', '-d', '-l', '-q']
         else:
-            _msg.verbose(p.stdout)
-            _msg.verbose()
-        _bar.inc_count()
-        if( _msg.get_level() == _msg.LOG_MIN ):
-            _bar.update()        
+            prog = ['git', '-C', repo_path, 'gc', '-q']
+        if not run_git_command(_msg, prog):
+            failed += 1
+    return failed
+
+def update_git_repos(_config, _msg, _bar):
+    patdev_repos = config_entry(_config.get("GitHub", "patdev_repos")).split(',')
+    try:
+        workers = int(config_option(_config, "GitHub", "update_workers", '4'))
+    except ValueError:
+        workers = 4
+    if workers < 1:
+        workers = 1
+
+    update_object_store(_config, _msg)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for result in executor.map(lambda repo: update_git_repo(_config, repo), patdev_repos):
+            if result['action'] == 'fresh':
+                _msg.normal("+ Local Repository is Current", result['repo'])
+            elif result['action'] == 'pull':
+                _msg.normal("+ Updating Local Repository", result['repo'])
+            else:
+                _msg.normal("+ Cloning GitHub Repository", result['repo'])
+
+            if result['returncode'] < 0:
+                _msg.normal("+ Exception: Command failed - " + result['prog'])
+                _msg.normal()
+                _msg.normal(result['stderr'])
+            elif result['returncode'] != 0:
+                _msg.normal("+ ERROR: Command failed - " + result['prog'])
+                _msg.normal()
+                _msg.normal(result['stdout'])
+                _msg.normal(result['stderr'])
+            elif result['prog']:
+                _msg.verbose(result['stdout'])
+                _msg.verbose()
+            _bar.inc_count()
+            if( _msg.get_level() == _msg.LOG_MIN ):
+                _bar.update()
 
 
@@ -18,7 +18,7 @@
 %define pythondir %{_libexecdir}/python3.6/site-packages
 
 Name:         sca-patterns-devel
-Version:      3.0.3
+Version:      3.1.0
 Release:      0
 Summary:      Supportconf Analysis Pattern Development Tools
 License:      GPL-2.0-only
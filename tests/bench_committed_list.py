@@ -0,0 +1,89 @@
+#!/usr/bin/python3
+"""Times GitHubRepository.get_committed_list on a synthetic repository
+
+A clone of a local bare repository gets a number of unpushed commits that each add
+a pattern file and modify the one before it. The single merge base diff used by
+get_committed_list is timed against the previous approach of listing the unpushed
+commits with git log and running git diff-tree for each of them.
+
+Usage: python3 tests/bench_committed_list.py [commits] [rounds]
+"""
+import os
+import re
+import sys
+import time
+import tempfile
+import subprocess as sp
+
+from common import pd, git, commit_files, quiet_msg
+
+def create_repo(base_dir, commits):
+    "Returns the path of a clone with commits unpushed pattern commits"
+    bare = os.path.join(base_dir, 'sca-patterns-bench.git')
+    repo = os.path.join(base_dir, 'sca-patterns-bench')
+    git('init', '-q', '--bare', bare)
+    git('clone', '-q', bare, repo)
+    commit_files(repo, {'patterns/SLE/sle15sp4/README': 'SLE 15 SP4 patterns\n'}, 'Initial patterns')
+    git('push', '-q', 'origin', 'HEAD', cwd=repo)
+    git('remote', 'set-head', 'origin', '-a', cwd=repo)
+    for i in range(commits):
+        files = {'patterns/SLE/sle15sp4/bench-{:04}.py'.format(i): '# pattern {}\n'.format(i)}
+        if i > 0:
+            files['patterns/SLE/sle15sp4/bench-{:04}.py'.format(i - 1)] = '# pattern {} modified\n'.format(i - 1)
+        commit_files(repo, files, 'Pattern {}'.format(i))
+    return repo
+
+def per_commit_list(path):
+    "The previous get_committed_list, one git diff-tree per unpushed commit"
+    committed_patterns = {}
+    pat_file = re.compile("^patterns/.*")
+    head_name = re.compile("HEAD.*origin/")
+    head_remote = ''
+    p = sp.run("git --no-pager branch -a", shell=True, cwd=path, check=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
+    for l in p.stdout.splitlines():
+        line = l.lstrip()
+        if head_name.search(line):
+            head_remote = line.split()[-1]
+    repo_range = head_remote + ".." + head_remote.split("/")[-1]
+    p = sp.run("git --no-pager log " + repo_range, shell=True, cwd=path, check=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
+    commit_list = [line.split()[1] for line in p.stdout.splitlines() if line.startswith("commit ")]
+    for commit in commit_list:
+        p = sp.run("git diff-tree --no-commit-id --name-only -r " + commit, shell=True, cwd=path, check=True, stdout=sp.PIPE, stderr=sp.PIPE, universal_newlines=True)
+        for l in p.stdout.splitlines():
+            line = l.lstrip()
+            if pat_file.search(line):
+                committed_patterns[line] = 'add'
+    return committed_patterns
+
+def merge_base_list(path):
+    git_repo = pd.GitHubRepository(quiet_msg(), path)
+    git_repo.get_committed_list()
+    return git_repo.committed_patterns
+
+def best_time(function, path, rounds):
+    "Returns the fastest of rounds runs and the result of the last one"
+    times = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        result = function(path)
+        times.append(time.perf_counter() - start)
+    return (min(times), result)
+
+def main():
+    commits = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with tempfile.TemporaryDirectory() as tmp:
+        print("Creating a repository with {} unpushed commits".format(commits))
+        repo = create_repo(tmp, commits)
+        (before, before_patterns) = best_time(per_commit_list, repo, rounds)
+        (after, after_patterns) = best_time(merge_base_list, repo, rounds)
+    if sorted(before_patterns) != sorted(after_patterns):
+        print("Error: The pattern lists differ")
+        return 1
+    print("Pattern files: {}, best of {} rounds".format(len(after_patterns), rounds))
+    print("  per commit diff-tree: {:.3f}s".format(before))
+    print("  merge base diff:      {:.3f}s".format(after))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
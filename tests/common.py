@@ -0,0 +1,74 @@
+"""Shared helpers for the patdevel tests
+
+The tests import lib/patdevel.py directly and run against temporary directories,
+local git repositories and local servers, nothing is installed or fetched.
+"""
+import os
+import sys
+import configparser
+import subprocess as sp
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), 'lib'))
+
+import patdevel as pd
+
+GIT_ENV = dict(os.environ, GIT_AUTHOR_NAME='Test User', GIT_AUTHOR_EMAIL='test@local', GIT_COMMITTER_NAME='Test User', GIT_COMMITTER_EMAIL='test@local', GIT_CONFIG_NOSYSTEM='1', GIT_CONFIG_GLOBAL=os.devnull)
+
+def git(*args, cwd=None):
+    "Runs git and returns its output, raising CalledProcessError on failure"
+    p = sp.run(['git', '-c', 'init.defaultBranch=master'] + list(args), cwd=cwd, env=GIT_ENV, universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE, check=True)
+    return p.stdout
+
+def commit_files(repo, files, message):
+    "Writes the files dictionary of relative paths and content into repo and commits them"
+    for name, content in files.items():
+        path = os.path.join(repo, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(content)
+    git('add', '-A', cwd=repo)
+    git('commit', '-q', '-m', message, cwd=repo)
+
+def make_config(base_dir, **sections):
+    """Returns a patdev configuration rooted at base_dir
+
+    Each keyword is a section name with a dictionary of options that are added to,
+    or replace, the defaults.
+    """
+    config = configparser.ConfigParser(interpolation=configparser.ExtendedInterpolation())
+    config.read_dict({
+        'Common': {
+            'sca_base_dir': base_dir,
+            'sca_arch_dir': '${sca_base_dir}/archives/',
+            'sca_repo_dir': '${sca_base_dir}/repos/',
+            'sca_lib_dir': '${sca_repo_dir}/sca-patterns-base/libraries/',
+            'author': 'Test User <test@local>',
+            'log_level': 'Quiet',
+        },
+        'Security': {
+            'base_dir': '${Common:sca_base_dir}',
+            'pat_dir': '${base_dir}/patterns/',
+            'pat_error': '${base_dir}/errors/',
+            'pat_logs': '${base_dir}/logs/',
+            'pat_dups': '${base_dir}/duplicates/',
+            'dir_list': '${pat_dir},${pat_error},${pat_logs},${pat_dups}',
+        },
+        'Distribution': {
+            'sle15': 'sle15sp5,sle15sp4',
+            'supported': '${sle15}',
+        },
+        'GitHub': {
+            'uri_base': 'file://' + base_dir + '/remote',
+            'patdev_repos': 'sca-patterns-sle15',
+        },
+    })
+    config.read_dict(sections)
+    for option in ('sca_arch_dir', 'sca_repo_dir'):
+        os.makedirs(config.get('Common', option), exist_ok=True)
+    for path in config.get('Security', 'dir_list').split(','):
+        os.makedirs(path, exist_ok=True)
+    return config
+
+def quiet_msg():
+    return pd.DisplayMessages(pd.DisplayMessages.LOG_QUIET)
@@ -0,0 +1,110 @@
+"""Bugzilla links are verified in batches against a local stand-in server"""
+import os
+import io
+import sys
+import runpy
+import tempfile
+import threading
+import unittest
+import contextlib
+import urllib.parse
+import http.server
+
+from common import pd, TESTS_DIR, make_config
+
+LINKCHK = os.path.join(os.path.dirname(TESTS_DIR), 'bin', 'linkchk')
+BAD_BUG = '999999'
+
+class BugzillaHandler(http.server.BaseHTTPRequestHandler):
+    "Answers show_bug.cgi XML requests, every bug except BAD_BUG exists"
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        query = urllib.parse.parse_qs(url.query)
+        self.server.requests.append(query.get('id', []))
+        if url.path != '/show_bug.cgi' or query.get('ctype') != ['xml']:
+            self.send_error(404)
+            return
+        content = '<?xml version="1.0" ?>\n<bugzilla>\n'
+        for bug_id in query['id']:
+            if bug_id == BAD_BUG:
+                content += '<bug error="NotFound"><bug_id>' + bug_id + '</bug_id></bug>\n'
+            else:
+                content += '<bug><bug_id>' + bug_id + '</bug_id><short_desc>Bug ' + bug_id + '</short_desc></bug>\n'
+        content += '</bugzilla>\n'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+class BugBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = http.server.HTTPServer(('127.0.0.1', 0), BugzillaHandler)
+        self.server.requests = []
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.bug_base_url = 'http://127.0.0.1:{}/show_bug.cgi?id='.format(self.server.server_address[1])
+        self.config = make_config(self.tmp.name, Common={'bug_base_url': self.bug_base_url}, Links={'bug_batch_size': '3'})
+        self.config_file = os.path.join(self.tmp.name, 'patdev.conf')
+        with open(self.config_file, 'w') as f:
+            self.config.write(f)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        self.tmp.cleanup()
+
+    def write_pattern(self, name, bugs):
+        path = self.config.get('Security', 'pat_dir') + name
+        links = '|'.join('META_LINK_BUG{}={}{}'.format(i, self.bug_base_url, bug) for i, bug in enumerate(bugs))
+        with open(path, 'w') as f:
+            f.write('#!/usr/bin/python3\nimport Core\n\nOTHER_LINKS = "' + links + '"\n')
+        return path
+
+    def run_linkchk(self):
+        "Runs linkchk with the test configuration and returns its globals"
+        (saved_file, saved_argv) = (pd.config_file, sys.argv)
+        pd.config_file = self.config_file
+        sys.argv = [LINKCHK, '-l', '0']
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                return runpy.run_path(LINKCHK, run_name='__main__')
+        finally:
+            (pd.config_file, sys.argv) = (saved_file, saved_argv)
+
+    def test_validator_batches(self):
+        validator = pd.LinkValidator(pd.DisplayMessages(pd.DisplayMessages.LOG_QUIET), self.config)
+        bugs = ['1001', '1002', BAD_BUG, '1004', '1005', '1006', '1007']
+        futures = validator.submit_links([self.bug_base_url + bug for bug in bugs])
+        statuses = [future.result() for future in futures]
+        validator.close()
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(sorted(len(ids) for ids in self.server.requests), [1, 3, 3])
+        self.assertEqual(sorted(bug for ids in self.server.requests for bug in ids), sorted(bugs))
+        self.assertEqual(statuses, ['Confirmed', 'Confirmed', 'Invalid BUG', 'Confirmed', 'Confirmed', 'Confirmed', 'Confirmed'])
+
+    def test_linkchk_maps_bad_bug(self):
+        first = self.write_pattern('first.py', ['1001', '1002', BAD_BUG])
+        second = self.write_pattern('second.py', [BAD_BUG, '1003'])
+        third = self.write_pattern('third.py', ['1004'])
+        results = self.run_linkchk()
+
+        # Five unique bugs in two batches of at most three, the bad one is shared by two patterns
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(sorted(bug for ids in self.server.requests for bug in ids), sorted(['1001', '1002', '1003', '1004', BAD_BUG]))
+        invalid_links = results['invalid_links']
+        bad_link = self.bug_base_url + BAD_BUG
+        self.assertEqual(invalid_links[first], {bad_link: 'Invalid BUG'})
+        self.assertEqual(invalid_links[second], {bad_link: 'Invalid BUG'})
+        self.assertNotIn(third, invalid_links)
+        self.assertEqual(results['c_']['bugid'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+"""Consolidated security announcement drivers, from generation to distribution"""
+import os
+import re
+import sys
+import tempfile
+import unittest
+import subprocess as sp
+
+from common import pd, git, commit_files, make_config, quiet_msg
+
+# Core keeps the worst status like the SCA library, SUSE reports a fixed result per announcement name
+CORE_STUB = """
+TEMP = -2
+PARTIAL = -1
+SUCC = 0
+REC = 1
+PROMO = 2
+WARN = 3
+CRIT = 4
+ERROR = 5
+IGNORE = 6
+OVERALL = TEMP
+OVERALL_INFO = ""
+OTHER_LINKS = ""
+
+def init(meta_class, meta_category, meta_component, pattern_filename, primary_link, overall, overall_info, other_links):
+    global OVERALL, OVERALL_INFO, OTHER_LINKS
+    (OVERALL, OVERALL_INFO, OTHER_LINKS) = (overall, overall_info, other_links)
+
+def updateStatus(overall, overall_info):
+    global OVERALL, OVERALL_INFO
+    if overall > OVERALL:
+        (OVERALL, OVERALL_INFO) = (overall, overall_info)
+
+def printPatternResults():
+    print(str(OVERALL) + "|" + OVERALL_INFO + "|" + OTHER_LINKS)
+"""
+
+SUSE_STUB = """
+import Core
+RESULTS = {'ignored': Core.IGNORE, 'critical': Core.CRIT, 'warning': Core.WARN, 'current': Core.SUCC}
+
+def getHostInfo():
+    return {'DistroVersion': 15, 'DistroPatchLevel': 4}
+
+def securityAnnouncementPackageCheck(name, main, ltss, severity, tag, packages):
+    Core.updateStatus(RESULTS[name], tag + " " + name)
+"""
+
+def add_announcement(consolidated, announcement_id, name, packages):
+    url = "https://lists.suse.com/pipermail/sle-security-updates/2023-May/" + announcement_id + ".html"
+    consolidated.add_entry(pd.sa_sles_tag, 15, 4, False, announcement_id, name, 'important', url, packages)
+
+class DriverTest(unittest.TestCase):
+    "Each announcement is checked on its own and the worst real result is reported"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = make_config(self.tmp.name)
+        self.lib_dir = os.path.join(self.tmp.name, 'lib')
+        os.makedirs(self.lib_dir)
+        with open(os.path.join(self.lib_dir, 'Core.py'), 'w') as f:
+            f.write(CORE_STUB)
+        with open(os.path.join(self.lib_dir, 'SUSE.py'), 'w') as f:
+            f.write(SUSE_STUB)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def run_driver(self, announcements):
+        consolidated = pd.ConsolidatedSecurityData(quiet_msg(), self.config, '1.0')
+        for announcement in announcements:
+            add_announcement(consolidated, *announcement)
+        files = consolidated.save()
+        driver = [name for name in files if name.endswith('.py')][0]
+        p = sp.run([sys.executable, consolidated.pat_dir + driver], env=dict(os.environ, PYTHONPATH=self.lib_dir), universal_newlines=True, stdout=sp.PIPE, stderr=sp.PIPE)
+        self.assertEqual(p.returncode, 0, p.stderr)
+        return p.stdout.strip().split('|', 2)
+
+    def test_later_hits_are_reported(self):
+        (overall, info, links) = self.run_driver([
+            ('SUSE-SU-2023:0001-1', 'ignored', {'ignored': '1.0'}),
+            ('SUSE-SU-2023:0002-1', 'warning', {'warning': '1.0'}),
+            ('SUSE-SU-2023:0003-1', 'critical', {'critical': '1.0'}),
+        ])
+        self.assertEqual(overall, '4')
+        self.assertIn('SUSE-SU-2023:0002-1', info)
+        self.assertIn('SUSE-SU-2023:0003-1', info)
+        self.assertNotIn('SUSE-SU-2023:0001-1', info)
+        self.assertIn('META_LINK_SUSE-SU-2023:0002-1=https://lists.suse.com/pipermail/sle-security-updates/2023-May/SUSE-SU-2023:0002-1.html', links)
+        self.assertIn('META_LINK_SUSE-SU-2023:0003-1=https://lists.suse.com/pipermail/sle-security-updates/2023-May/SUSE-SU-2023:0003-1.html', links)
+        self.assertTrue(links.startswith('META_LINK_Security='))
+
+    def test_nothing_affected(self):
+        (overall, info, links) = self.run_driver([
+            ('SUSE-SU-2023:0001-1', 'ignored', {'ignored': '1.0'}),
+            ('SUSE-SU-2023:0004-1', 'current', {'current': '1.0'}),
+        ])
+        self.assertEqual(overall, '0')
+
+    def test_main_package(self):
+        consolidated = pd.ConsolidatedSecurityData(quiet_msg(), self.config, '1.0')
+        add_announcement(consolidated, 'SUSE-SU-2023:0001-1', 'openssl', {'openssl': '1.1', 'libopenssl1_1': '1.1'})
+        add_announcement(consolidated, 'SUSE-SU-2023:0005-1', 'Java', {'java-11-openjdk': '11.0'})
+        announcements = list(consolidated.distros.values())[0]['announcements']
+        self.assertEqual(announcements['SUSE-SU-2023:0001-1']['main'], 'openssl')
+        self.assertEqual(announcements['SUSE-SU-2023:0005-1']['main'], '')
+
+class DistributionTest(unittest.TestCase):
+    "A consolidated driver is listed with the security patterns, distributed and replaced the next month"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = make_config(self.tmp.name)
+        self.pat_dir = self.config.get('Security', 'pat_dir')
+        self.repo = os.path.join(self.config.get('Common', 'sca_repo_dir'), 'sca-patterns-sle15')
+        git('init', '-q', self.repo)
+        commit_files(self.repo, {'patterns/SLE/sle15sp4/README': 'SLE 15 SP4 patterns\n', 'patterns/SLE/sle15sp5/README': 'SLE 15 SP5 patterns\n'}, 'Initial patterns')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def security_patterns(self):
+        "Lists the security patterns like samgr does"
+        sa_pattern = re.compile(pd.sa_pattern_filter)
+        return [path for path in pd.get_pattern_list(self.pat_dir) if sa_pattern.search(path)]
+
+    def generate(self, announcement_id):
+        consolidated = pd.ConsolidatedSecurityData(quiet_msg(), self.config, '1.0')
+        add_announcement(consolidated, announcement_id, 'openssl', {'openssl': '1.1'})
+        consolidated.save()
+        return self.pat_dir + pd.sa_consolidated_base + "_sles_15.4.py"
+
+    def test_distribute(self):
+        driver = self.generate('SUSE-SU-2023:0001-1')
+        with open(self.pat_dir + 'openssl_SUSE-SU-2023_0001-1_sles_15.4.py', 'w') as f:
+            f.write('# announcement pattern\n')
+        with open(self.pat_dir + 'regular-pattern.py', 'w') as f:
+            f.write('# not a security pattern\n')
+        patterns = self.security_patterns()
+        self.assertIn(driver, patterns)
+        self.assertEqual(len(patterns), 2)
+
+        target = os.path.join(self.repo, 'patterns/SLE/sle15sp4', os.path.basename(driver))
+        pd.distribute_sa_patterns(self.config, quiet_msg(), [driver])
+        with open(target) as f:
+            self.assertIn('SUSE-SU-2023:0001-1', f.read())
+        self.assertIn('patterns/SLE/sle15sp4/' + os.path.basename(driver), git('diff', '--cached', '--name-only', cwd=self.repo))
+
+        # The distributed driver is in the pattern index, but is not a duplicate of the regenerated one
+        git('commit', '-q', '-m', 'Distributed', cwd=self.repo)
+        self.assertTrue(pd.PatternIndex(quiet_msg(), self.config).contains(driver))
+        self.assertTrue(pd.is_consolidated_pattern(driver))
+
+        driver = self.generate('SUSE-SU-2023:0002-1')
+        plan = pd.plan_sa_distribution(self.config, [driver])
+        self.assertEqual([entry['action'] for entry in plan['sle15sp4']], ['update'])
+        pd.distribute_sa_patterns(self.config, quiet_msg(), [driver])
+        with open(target) as f:
+            content = f.read()
+        self.assertIn('SUSE-SU-2023:0001-1', content)
+        self.assertIn('SUSE-SU-2023:0002-1', content)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(target))), sorted(['README', os.path.basename(driver)]))
+        self.assertFalse(os.path.exists(target + '.tmp'))
+
+if __name__ == '__main__':
+    unittest.main()
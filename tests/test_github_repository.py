@@ -0,0 +1,79 @@
+"""GitHubRepository state read from the git directory"""
+import io
+import os
+import time
+import tempfile
+import unittest
+import contextlib
+
+from common import pd, git, commit_files, quiet_msg
+
+class PackedHeadTest(unittest.TestCase):
+    "The HEAD commit tree is read from the packs, deltified commits are left for git"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = os.path.join(self.tmp.name, 'sca-patterns-test')
+        git('init', '-q', self.repo)
+        git('remote', 'add', 'origin', 'https://github.com/openSUSE/sca-patterns-test.git', cwd=self.repo)
+        for i in range(30):
+            commit_files(self.repo, {'patterns/test.py': 'line\n' * (i + 1)}, 'Update the test pattern with a long shared commit message, number {}'.format(i))
+        git('repack', '-a', '-d', '-f', '-q', '--window=250', '--depth=50', cwd=self.repo)
+        self.whole = []
+        self.deltified = []
+        idx = [name for name in os.listdir(os.path.join(self.repo, '.git/objects/pack')) if name.endswith('.idx')][0]
+        for line in git('verify-pack', '-v', '.git/objects/pack/' + idx, cwd=self.repo).splitlines():
+            fields = line.split()
+            if len(fields) > 1 and fields[1] == 'commit':
+                (self.deltified if len(fields) > 5 else self.whole).append(fields[0])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def checkout(self, oid):
+        "Checks out oid on a branch and makes the index entries older than the index"
+        git('checkout', '-q', '-B', 'work', oid, cwd=self.repo)
+        past = time.time() - 60
+        for root, dirs, files in os.walk(self.repo):
+            dirs[:] = [d for d in dirs if d != '.git']
+            for name in files:
+                os.utime(os.path.join(root, name), (past, past))
+        git('update-index', '-q', '--really-refresh', cwd=self.repo)
+
+    def tree_of(self, oid):
+        return git('rev-parse', oid + '^{tree}', cwd=self.repo).strip()
+
+    def test_whole_commit(self):
+        oid = self.whole[0]
+        self.checkout(oid)
+        git_repo = pd.GitHubRepository(quiet_msg(), self.repo)
+        self.assertEqual(git_repo._GitHubRepository__read_commit_tree(oid), self.tree_of(oid))
+        self.assertTrue(git_repo.get_info()['valid'])
+
+    def test_deltified_commit(self):
+        if not self.deltified:
+            self.skipTest("git did not deltify any commit")
+        oid = self.deltified[0]
+        self.checkout(oid)
+        git_repo = pd.GitHubRepository(quiet_msg(), self.repo)
+        self.assertEqual(git_repo._GitHubRepository__read_commit_tree(oid), '')
+        self.assertTrue(git_repo.get_info()['valid'])
+        self.assertEqual(git_repo.head_oid, oid)
+        self.assertEqual(git_repo.status_entries, [])
+
+class RunGitTest(unittest.TestCase):
+
+    def test_exception_is_buffered(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            msg = pd.DisplayMessages(pd.DisplayMessages.LOG_NORMAL, True)
+            git_repo = pd.GitHubRepository(msg, os.path.join(tmp, 'missing'))
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                self.assertIsNone(git_repo._GitHubRepository__run_git('status', ['status']))
+                self.assertEqual(output.getvalue(), '')
+                msg.flush()
+            self.assertIn('missing', output.getvalue())
+            self.assertIn('-' * pd.SEPARATOR_LEN, output.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+"""Link cache entries expire with the time to live of their status"""
+import json
+import tempfile
+import unittest
+
+from common import pd, make_config, quiet_msg
+
+OLD_LINK = 'http://old.example.com/page'
+NEW_LINK = 'https://new.example.com/page'
+HOP_LINK = 'https://old.example.com/page'
+
+class LinkCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.config = make_config(self.tmp.name, Links={'cache_ttl_confirmed': '1000', 'cache_ttl_invalid': '100'})
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def cache(self):
+        return pd.LinkCache(quiet_msg(), self.config)
+
+    def add_redirect(self, age):
+        "Saves an old host redirect chain checked age seconds ago"
+        cache = self.cache()
+        cache.add(OLD_LINK, {'status': 'Old Host', 'final_url': NEW_LINK, 'redirects': [HOP_LINK, NEW_LINK], 'content': False})
+        cache.add(NEW_LINK, {'status': 'Confirmed', 'final_url': NEW_LINK, 'redirects': [], 'content': False})
+        for entry in cache.links.values():
+            entry['checked'] -= age
+        cache.save()
+
+    def saved_links(self):
+        with open(self.cache().path) as f:
+            return json.load(f)['links']
+
+    def test_fresh_redirect(self):
+        self.add_redirect(50)
+        cache = self.cache()
+        self.assertEqual(cache.get_redirect(OLD_LINK)['final_url'], NEW_LINK)
+        self.assertEqual(cache.get_redirect(HOP_LINK)['final_url'], NEW_LINK)
+        self.assertEqual(sorted(self.saved_links()), sorted([OLD_LINK, NEW_LINK]))
+
+    def test_expired_redirect(self):
+        self.add_redirect(500)
+        cache = self.cache()
+        self.assertIsNone(cache.get_redirect(OLD_LINK))
+        self.assertIsNone(cache.get_redirect(HOP_LINK))
+        self.assertIsNotNone(cache.get(NEW_LINK))
+
+        # The expired chain is dropped on the next save, the confirmed link is kept until its own time to live
+        cache.add('https://other.example.com/', {'status': 'Confirmed', 'final_url': 'https://other.example.com/', 'redirects': [], 'content': False})
+        cache.save()
+        self.assertEqual(sorted(self.saved_links()), sorted([NEW_LINK, 'https://other.example.com/']))
+
+if __name__ == '__main__':
+    unittest.main()
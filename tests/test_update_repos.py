@@ -0,0 +1,118 @@
+"""Repository updates against local bare repositories"""
+import os
+import tempfile
+import unittest
+
+from common import pd, git, commit_files, make_config, quiet_msg
+
+REPOS = ['sca-patterns-sle15', 'sca-patterns-base']
+
+class LocalRemoteTest(unittest.TestCase):
+    "Creates a file:// bare repository for each pattern repository"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.remote_dir = os.path.join(self.tmp.name, 'remote')
+        work = os.path.join(self.tmp.name, 'work')
+        for repo in REPOS:
+            bare = os.path.join(self.remote_dir, repo + '.git')
+            git('init', '-q', '--bare', bare)
+            git('config', 'uploadpack.allowFilter', 'true', cwd=bare)
+            git('clone', '-q', bare, os.path.join(work, repo))
+            commit_files(os.path.join(work, repo), {'patterns/SLE/sle15sp4/' + repo + '.py': '# pattern\n', 'docs/README': 'documentation\n'}, 'Initial patterns')
+            git('push', '-q', 'origin', 'HEAD', cwd=os.path.join(work, repo))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def config(self, **github):
+        github.setdefault('patdev_repos', ','.join(REPOS))
+        return make_config(self.tmp.name, GitHub=github)
+
+    def repo_path(self, config, repo):
+        return config.get('Common', 'sca_repo_dir') + repo
+
+class UpdateGitRepoTest(LocalRemoteTest):
+
+    def test_fetch_ttl(self):
+        config = self.config(fetch_ttl='600')
+        self.assertEqual(pd.update_git_repo(config, REPOS[0])['action'], 'clone')
+        result = pd.update_git_repo(config, REPOS[0])
+        self.assertEqual((result['action'], result['returncode']), ('pull', 0))
+        self.assertEqual(pd.update_git_repo(config, REPOS[0])['action'], 'fresh')
+
+        # An expired or disabled fetch_ttl pulls again
+        fetch_head = self.repo_path(config, REPOS[0]) + '/.git/FETCH_HEAD'
+        os.utime(fetch_head, (0, 0))
+        self.assertEqual(pd.update_git_repo(config, REPOS[0])['action'], 'pull')
+        self.assertEqual(pd.update_git_repo(self.config(fetch_ttl='0'), REPOS[0])['action'], 'pull')
+        self.assertEqual(pd.update_git_repo(self.config(fetch_ttl='soon'), REPOS[0])['action'], 'pull')
+
+    def test_partial_sparse_clone(self):
+        config = self.config(partial_clone='True', sparse_checkout='patterns/SLE')
+        for repo in REPOS:
+            result = pd.update_git_repo(config, repo)
+            self.assertEqual((result['action'], result['returncode']), ('clone', 0), result['stderr'])
+        sparse = self.repo_path(config, 'sca-patterns-sle15')
+        self.assertEqual(git('config', 'remote.origin.partialclonefilter', cwd=sparse).strip(), 'blob:none')
+        self.assertTrue(os.path.exists(sparse + '/patterns/SLE/sle15sp4/sca-patterns-sle15.py'))
+        self.assertFalse(os.path.exists(sparse + '/docs/README'))
+        # The base and server report repositories are always checked out in full
+        self.assertTrue(os.path.exists(self.repo_path(config, 'sca-patterns-base') + '/docs/README'))
+
+class NoProgress():
+    def inc_count(self):
+        pass
+
+    def update(self):
+        pass
+
+class ObjectStoreTest(LocalRemoteTest):
+
+    def setUp(self):
+        super().setUp()
+        self.store = os.path.join(self.tmp.name, 'store.git')
+
+    def fsck(self, path):
+        git('fsck', '--connectivity-only', '--no-dangling', cwd=path)
+
+    def test_relative_store(self):
+        self.assertEqual(pd.get_object_store(self.config(object_store='store.git')), '')
+        self.assertEqual(pd.get_object_store(self.config(object_store=self.store + '/')), self.store)
+
+    def test_clones_borrow_from_store(self):
+        config = self.config(object_store=self.store)
+        pd.update_git_repos(config, quiet_msg(), NoProgress())
+        self.assertEqual(git('config', 'gc.auto', cwd=self.store).strip(), '0')
+        self.assertEqual(git('config', 'gc.pruneExpire', cwd=self.store).strip(), 'never')
+        for repo in REPOS:
+            path = self.repo_path(config, repo)
+            with open(path + '/.git/objects/info/alternates') as f:
+                self.assertEqual(f.read().strip(), self.store + '/objects')
+            self.fsck(path)
+
+    def test_maintain_keeps_clones(self):
+        config = self.config(object_store=self.store)
+        pd.update_git_repos(config, quiet_msg(), NoProgress())
+        work = os.path.join(self.tmp.name, 'work', REPOS[0])
+        clone = self.repo_path(config, REPOS[0])
+
+        # A rewritten remote leaves the store objects the clone uses unreferenced
+        git('checkout', '-q', '--orphan', 'rewritten', cwd=work)
+        commit_files(work, {'patterns/SLE/sle15sp4/rewritten.py': '# rewritten\n'}, 'Rewritten history')
+        git('push', '-q', '-f', 'origin', 'HEAD:master', cwd=work)
+        self.assertEqual(pd.maintain_git_repos(config, quiet_msg()), 0)
+        self.assertEqual(git('count-objects', '-v', cwd=clone).split('\n')[0], 'count: 0')
+
+        # Even an old unreferenced object is never pruned from the store
+        past = 1000000000
+        for root, dirs, files in os.walk(os.path.join(self.store, 'objects')):
+            for name in files:
+                os.utime(os.path.join(root, name), (past, past))
+        git('gc', '-q', cwd=self.store)
+        git('gc', '-q', '--auto', cwd=self.store)
+        for repo in REPOS:
+            self.fsck(self.repo_path(config, repo))
+
+if __name__ == '__main__':
+    unittest.main()